@@ -0,0 +1,388 @@
+import heapq
+import time
+import tracemalloc
+from collections import deque
+from itertools import count
+
+
+class Node():
+    __slots__ = ("state", "parent", "action", "cost")
+
+    def __init__(self, state, parent, action, cost=0):
+        self.state = state
+        self.parent = parent
+        self.action = action
+        self.cost = cost
+
+    def path(self):
+        """
+        Returns the (actions, states) that lead from the root to this node,
+        not including the root's state.
+        """
+        actions = []
+        states = []
+        node = self
+        while node.parent is not None:
+            actions.append(node.action)
+            states.append(node.state)
+            node = node.parent
+        actions.reverse()
+        states.reverse()
+        return actions, states
+
+
+class StackFrontier():
+    """
+    Last-in first-out frontier. Keeps a count of the states it holds,
+    so `contains_state` is a hash lookup rather than a scan.
+    """
+
+    def __init__(self):
+        self.frontier = []
+        self.states = {}
+
+    def add(self, node):
+        self.frontier.append(node)
+        self._track(node.state)
+
+    def contains_state(self, state):
+        return state in self.states
+
+    def empty(self):
+        return len(self.frontier) == 0
+
+    def __len__(self):
+        return len(self.frontier)
+
+    def remove(self):
+        if self.empty():
+            raise Exception("empty frontier")
+        node = self.frontier.pop()
+        self._untrack(node.state)
+        return node
+
+    def _track(self, state):
+        self.states[state] = self.states.get(state, 0) + 1
+
+    def _untrack(self, state):
+        remaining = self.states[state] - 1
+        if remaining:
+            self.states[state] = remaining
+        else:
+            del self.states[state]
+
+
+class QueueFrontier(StackFrontier):
+    """
+    First-in first-out frontier backed by a deque.
+    """
+
+    def __init__(self):
+        self.frontier = deque()
+        self.states = {}
+
+    def remove(self):
+        if self.empty():
+            raise Exception("empty frontier")
+        node = self.frontier.popleft()
+        self._untrack(node.state)
+        return node
+
+
+class PriorityFrontier():
+    """
+    Binary-heap frontier that removes the node with the lowest priority,
+    oldest first among equals.
+
+    Adding a state already in the frontier with a lower priority replaces it;
+    the old heap entry is skipped when it surfaces.
+    """
+
+    def __init__(self):
+        self.heap = []
+        self.best = {}
+        self.order = count()
+
+    def add(self, node, priority):
+        best = self.best.get(node.state)
+        if best is not None and best[0] <= priority:
+            return
+        entry = (priority, next(self.order), node)
+        self.best[node.state] = entry
+        heapq.heappush(self.heap, entry)
+
+    def contains_state(self, state):
+        return state in self.best
+
+    def priority(self, state):
+        return self.best[state][0]
+
+    def empty(self):
+        return len(self.best) == 0
+
+    def __len__(self):
+        return len(self.best)
+
+    def remove(self):
+        while self.heap:
+            entry = heapq.heappop(self.heap)
+            node = entry[2]
+            if self.best.get(node.state) is entry:
+                del self.best[node.state]
+                return node
+        raise Exception("empty frontier")
+
+
+class BucketFrontier(PriorityFrontier):
+    """
+    Bucket-queue frontier for small non-negative integer priorities,
+    such as path lengths on unit-cost graphs.
+
+    The lowest non-empty bucket is found by scanning forward from the
+    lowest priority added, which costs O(1) amortized when priorities
+    removed never decrease (as in BFS, or A* with a consistent heuristic).
+    """
+
+    def __init__(self):
+        self.buckets = []
+        self.best = {}
+        self.lowest = 0
+
+    def add(self, node, priority):
+        best = self.best.get(node.state)
+        if best is not None and best[0] <= priority:
+            return
+        entry = (priority, node)
+        self.best[node.state] = entry
+        while len(self.buckets) <= priority:
+            self.buckets.append(deque())
+        self.buckets[priority].append(entry)
+        self.lowest = min(self.lowest, priority)
+
+    def remove(self):
+        buckets = self.buckets
+        while self.lowest < len(buckets):
+            bucket = buckets[self.lowest]
+            while bucket:
+                entry = bucket.popleft()
+                node = entry[1]
+                if self.best.get(node.state) is entry:
+                    del self.best[node.state]
+                    return node
+            self.lowest += 1
+        raise Exception("empty frontier")
+
+
+class SearchStats():
+    """
+    Opt-in instrumentation for one search: pass an instance to a search
+    driver to record what the search did. Searches given no stats object
+    skip all of this.
+
+    If `trace_memory` is set, Python memory is traced while the search runs
+    and its high-water mark recorded, which slows the search down. If
+    `callback` is given, it is called with the stats when the search ends.
+    """
+
+    def __init__(self, callback=None, trace_memory=False):
+        self.callback = callback
+        self.trace_memory = trace_memory
+        self.expanded = 0
+        self.peak_frontier = 0
+        self.neighbor_seconds = 0.0
+        self.seconds = 0.0
+        self.peak_memory = None
+        self._started = None
+        self._tracing = False
+
+    def start(self):
+        if self.trace_memory:
+            self._tracing = not tracemalloc.is_tracing()
+            if self._tracing:
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+            self._baseline = tracemalloc.get_traced_memory()[0]
+        self._started = time.perf_counter()
+
+    def expanding(self, frontier_size):
+        """
+        Records that a node is about to be removed from a frontier
+        holding `frontier_size` nodes and expanded.
+        """
+        self.expanded += 1
+        if frontier_size > self.peak_frontier:
+            self.peak_frontier = frontier_size
+
+    def layer(self, count, frontier_size, seconds):
+        """
+        Records a whole layer of `count` nodes expanded at once, as layered
+        breadth-first searches do, from frontiers holding `frontier_size`
+        nodes, spending `seconds` generating their neighbors.
+        """
+        self.expanded += count
+        if frontier_size > self.peak_frontier:
+            self.peak_frontier = frontier_size
+        self.neighbor_seconds += seconds
+
+    def timed(self, neighbors):
+        """
+        Wraps a `neighbors` function so the time spent in it is recorded.
+        """
+        def timed_neighbors(state):
+            started = time.perf_counter()
+            result = list(neighbors(state))
+            self.neighbor_seconds += time.perf_counter() - started
+            return result
+        return timed_neighbors
+
+    def stop(self):
+        self.seconds += time.perf_counter() - self._started
+        if self.trace_memory:
+            self.peak_memory = tracemalloc.get_traced_memory()[1] - self._baseline
+            if self._tracing:
+                tracemalloc.stop()
+        if self.callback is not None:
+            self.callback(self)
+
+    def as_dict(self):
+        return {
+            "expanded": self.expanded,
+            "peak_frontier": self.peak_frontier,
+            "neighbor_seconds": self.neighbor_seconds,
+            "seconds": self.seconds,
+            "peak_memory_bytes": self.peak_memory
+        }
+
+    def __str__(self):
+        lines = [
+            f"Nodes expanded: {self.expanded}",
+            f"Peak frontier size: {self.peak_frontier}",
+            f"Neighbor generation: {self.neighbor_seconds * 1000:.3f} ms",
+            f"Total time: {self.seconds * 1000:.3f} ms"
+        ]
+        if self.peak_memory is not None:
+            lines.append(f"Peak memory: {self.peak_memory / 1024:.1f} KiB")
+        return "\n".join(lines)
+
+
+def unit_cost(state, action, next_state):
+    return 1
+
+
+def graph_search(start, is_goal, neighbors, frontier, explored=None, stats=None):
+    """
+    Searches from state `start` using `frontier` to pick the next node,
+    testing for the goal when a node is removed. `neighbors(state)`
+    yields (action, state) pairs.
+
+    Returns the goal Node, or None if no goal is reachable. States are
+    added to `explored`, if given, as they are expanded, and the search
+    is recorded in `stats`, if given.
+    """
+    if explored is None:
+        explored = set()
+    if stats is not None:
+        stats.start()
+        neighbors = stats.timed(neighbors)
+    frontier.add(Node(state=start, parent=None, action=None))
+
+    try:
+        while not frontier.empty():
+            if stats is not None:
+                stats.expanding(len(frontier))
+            node = frontier.remove()
+            if is_goal(node.state):
+                return node
+            explored.add(node.state)
+
+            for action, state in neighbors(node.state):
+                if not frontier.contains_state(state) and state not in explored:
+                    frontier.add(Node(
+                        state=state, parent=node, action=action, cost=node.cost + 1
+                    ))
+
+        return None
+    finally:
+        if stats is not None:
+            stats.stop()
+
+
+def depth_first_search(start, is_goal, neighbors, explored=None, stats=None):
+    return graph_search(start, is_goal, neighbors, StackFrontier(), explored, stats)
+
+
+def breadth_first_search(start, is_goal, neighbors, explored=None, stats=None):
+    return graph_search(start, is_goal, neighbors, QueueFrontier(), explored, stats)
+
+
+def best_first_search(start, is_goal, neighbors, priority,
+                      frontier=None, cost=unit_cost, explored=None, stats=None):
+    """
+    Searches from state `start`, always expanding the frontier node with
+    the lowest `priority(node)`. Nodes carry their path cost, summed from
+    `cost(state, action, next_state)`.
+
+    Returns the goal Node, or None if no goal is reachable. States are
+    added to `explored`, if given, as they are expanded, and the search
+    is recorded in `stats`, if given.
+    """
+    if explored is None:
+        explored = set()
+    if frontier is None:
+        frontier = PriorityFrontier()
+    if stats is not None:
+        stats.start()
+        neighbors = stats.timed(neighbors)
+    root = Node(state=start, parent=None, action=None)
+    frontier.add(root, priority(root))
+
+    try:
+        while not frontier.empty():
+            if stats is not None:
+                stats.expanding(len(frontier))
+            node = frontier.remove()
+            if is_goal(node.state):
+                return node
+            explored.add(node.state)
+
+            for action, state in neighbors(node.state):
+                if state in explored:
+                    continue
+                child = Node(
+                    state=state, parent=node, action=action,
+                    cost=node.cost + cost(node.state, action, state)
+                )
+                frontier.add(child, priority(child))
+
+        return None
+    finally:
+        if stats is not None:
+            stats.stop()
+
+
+def uniform_cost_search(start, is_goal, neighbors,
+                        frontier=None, cost=unit_cost, explored=None, stats=None):
+    return best_first_search(
+        start, is_goal, neighbors, lambda node: node.cost,
+        frontier, cost, explored, stats
+    )
+
+
+def astar_search(start, is_goal, neighbors, heuristic,
+                 frontier=None, cost=unit_cost, explored=None, stats=None):
+    """
+    A* search: expands nodes in order of path cost plus `heuristic(state)`.
+    Returns an optimal path when the heuristic never overestimates.
+    """
+    return best_first_search(
+        start, is_goal, neighbors, lambda node: node.cost + heuristic(node.state),
+        frontier, cost, explored, stats
+    )
+
+
+def greedy_best_first_search(start, is_goal, neighbors, heuristic,
+                             frontier=None, explored=None, stats=None):
+    return best_first_search(
+        start, is_goal, neighbors, lambda node: heuristic(node.state),
+        frontier, unit_cost, explored, stats
+    )
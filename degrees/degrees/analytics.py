@@ -0,0 +1,159 @@
+import json
+import sys
+
+import numpy as np
+import scipy.sparse as sp
+from scipy.sparse.csgraph import connected_components
+
+import degrees
+
+
+class Analytics():
+    """
+    Bulk, vectorized statistics over a Graph.
+
+    Wraps the graph's CSR arrays as a sparse person-by-movie incidence
+    matrix without copying them, so neighborhoods and degrees are computed
+    with sparse products instead of Python loops.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+        num_people, num_movies = graph.num_people, graph.num_movies
+
+        person_offsets = np.asarray(graph.person_offsets, dtype=np.int64)
+        person_movies = np.asarray(graph.person_movies, dtype=np.int32)
+        movie_offsets = np.asarray(graph.movie_offsets, dtype=np.int64)
+        movie_people = np.asarray(graph.movie_people, dtype=np.int32)
+
+        # Rows are people and columns movies; the transpose is kept in CSR
+        # form too, from the graph's own movie-to-person arrays
+        self.incidence = sp.csr_matrix(
+            (np.ones(len(person_movies), dtype=bool), person_movies, person_offsets),
+            shape=(num_people, num_movies)
+        )
+        self.incidence_t = sp.csr_matrix(
+            (np.ones(len(movie_people), dtype=bool), movie_people, movie_offsets),
+            shape=(num_movies, num_people)
+        )
+
+    def hop_distances(self, sources, k):
+        """
+        Returns an int16 array of each person's degrees of separation from
+        the nearest of the person indices `sources`, up to `k`, or -1 for
+        people farther away than `k` degrees.
+        """
+        num_people = self.graph.num_people
+        distances = np.full(num_people, -1, dtype=np.int16)
+        frontier = np.zeros(num_people, dtype=bool)
+        frontier[np.atleast_1d(sources)] = True
+        distances[frontier] = 0
+
+        for hop in range(1, k + 1):
+            # People -> movies -> people, as two boolean sparse products
+            # (bool sparse products OR together rather than add up)
+            movies = self.incidence_t @ frontier
+            reached = self.incidence @ movies
+            frontier = reached & (distances < 0)
+            if not frontier.any():
+                break
+            distances[frontier] = hop
+        return distances
+
+    def within(self, sources, k):
+        """
+        Returns the indices of everyone within `k` degrees of
+        any of the person indices `sources`, themselves included.
+        """
+        return np.flatnonzero(self.hop_distances(sources, k) >= 0)
+
+    def movie_counts(self):
+        """
+        Returns the number of movies each person starred in.
+        """
+        return np.diff(self.incidence.indptr)
+
+    def cast_sizes(self):
+        """
+        Returns the number of stars of each movie.
+        """
+        return np.diff(self.incidence_t.indptr)
+
+    def costar_counts(self, chunk_size=65536):
+        """
+        Returns the number of distinct co-stars of each person.
+
+        Rows of the person-by-person product are formed a chunk at a time,
+        so memory stays bounded by the largest chunk's neighborhoods.
+        """
+        num_people = self.graph.num_people
+        counts = np.zeros(num_people, dtype=np.int64)
+        has_movies = self.movie_counts() > 0
+        for start in range(0, num_people, chunk_size):
+            end = min(start + chunk_size, num_people)
+            costars = self.incidence[start:end] @ self.incidence_t
+            counts[start:end] = np.diff(costars.indptr)
+
+            # Anyone with a movie counts themselves as a co-star
+            counts[start:end] -= has_movies[start:end]
+        return counts
+
+    def components(self):
+        """
+        Returns (count, labels): the number of connected groups of people,
+        and each person's group label. People in no movie are each alone.
+        """
+        num_people = self.graph.num_people
+        adjacency = sp.bmat([
+            [None, self.incidence],
+            [self.incidence_t, None]
+        ], format="csr")
+        _, labels = connected_components(adjacency, directed=False)
+
+        # Renumber the labels that people fall in, ignoring movie-only ones
+        _, person_labels = np.unique(labels[:num_people], return_inverse=True)
+        return int(person_labels.max()) + 1 if num_people else 0, person_labels
+
+    def summary(self):
+        """
+        Returns graph-wide degree and component statistics as a dict.
+        """
+        movie_counts = self.movie_counts()
+        cast_sizes = self.cast_sizes()
+        costars = self.costar_counts()
+        count, labels = self.components()
+        sizes = np.bincount(labels) if len(labels) else np.zeros(0, dtype=np.int64)
+        return {
+            "people": self.graph.num_people,
+            "movies": self.graph.num_movies,
+            "credits": int(self.incidence.nnz),
+            "movies_per_person": histogram(movie_counts),
+            "cast_sizes": histogram(cast_sizes),
+            "costars_per_person": histogram(costars),
+            "components": count,
+            "largest_component": int(sizes.max()) if len(sizes) else 0,
+            "component_sizes": histogram(sizes)
+        }
+
+
+def histogram(values):
+    """
+    Returns {value: how many times it occurs} for an integer array.
+    """
+    counts = np.bincount(values) if len(values) else np.zeros(0, dtype=np.int64)
+    present = np.flatnonzero(counts)
+    return {int(value): int(counts[value]) for value in present}
+
+
+def main():
+    if len(sys.argv) != 2:
+        sys.exit("Usage: python analytics.py directory")
+
+    print("Loading data...", file=sys.stderr)
+    degrees.load_data(sys.argv[1])
+    print("Data loaded.", file=sys.stderr)
+    print(json.dumps(Analytics(degrees.graph).summary(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+import csv
+import json
+import sys
+from concurrent.futures import as_completed
+
+import degrees
+from graph import bfs_tree, tree_path
+
+
+def main():
+    if len(sys.argv) not in [2, 3]:
+        sys.exit("Usage: python batch.py directory [pairs.csv]")
+    directory = sys.argv[1]
+
+    # Load data once; forked workers share it copy-on-write
+    print("Loading data...", file=sys.stderr)
+    degrees.load_data(directory)
+    print("Data loaded.", file=sys.stderr)
+
+    if len(sys.argv) == 3:
+        with open(sys.argv[2], encoding="utf-8", newline="") as f:
+            groups = group_pairs(read_pairs(f))
+    else:
+        groups = group_pairs(read_pairs(sys.stdin))
+
+    for record in solve_groups(directory, groups):
+        print(json.dumps(record))
+
+
+def read_pairs(f):
+    """
+    Yields (source, target) person_id pairs from the CSV rows in `f`,
+    skipping blank lines and an optional `source,target` header.
+    """
+    for row in csv.reader(f):
+        if len(row) < 2 or row[:2] == ["source", "target"]:
+            continue
+        yield row[0].strip(), row[1].strip()
+
+
+def group_pairs(pairs):
+    """
+    Returns a list of (source, [targets]) groups, so that each source
+    is searched from only once.
+    """
+    groups = {}
+    for source, target in pairs:
+        groups.setdefault(source, []).append(target)
+    return list(groups.items())
+
+
+def solve_groups(directory, groups, workers=None):
+    """
+    Solves every group on a process pool and yields one result record
+    per (source, target) pair, in the order groups finish.
+    """
+    with degrees.worker_pool(directory, workers) as pool:
+        futures = [pool.submit(solve_group, group) for group in groups]
+        for future in as_completed(futures):
+            yield from future.result()
+
+
+def solve_group(group):
+    """
+    Answers every target in a (source, [targets]) group from
+    a single breadth-first search tree rooted at the source.
+    """
+    source, targets = group
+    graph = degrees.graph
+
+    source_index = graph.person_index(source)
+    target_indices = [graph.person_index(target) for target in targets]
+    if source_index is None:
+        parent = {}
+    else:
+        parent = bfs_tree(
+            graph, source_index,
+            [target for target in target_indices if target is not None]
+        )
+
+    records = []
+    for target, target_index in zip(targets, target_indices):
+        path = None if target_index is None else tree_path(parent, target_index)
+        if path is not None:
+            path = graph.id_path(path)
+        records.append({
+            "source": source,
+            "target": target,
+            "degrees": None if path is None else len(path),
+            "path": path
+        })
+    return records
+
+
+if __name__ == "__main__":
+    main()
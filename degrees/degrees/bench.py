@@ -0,0 +1,152 @@
+import json
+import multiprocessing
+import random
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import degrees
+from graph import compact_graph
+from ingest import load_parallel, load_serial
+from snapshot import current_signature, load_snapshot, snapshot_path
+from synthetic import generate
+
+LOAD_MODES = ("csv", "compact", "parallel", "snapshot")
+DEFAULT_PAIRS = 1000
+
+
+def main():
+    if len(sys.argv) not in [2, 3, 4]:
+        sys.exit("Usage: python bench.py (directory | synthetic:edges) [pairs] [results.json]")
+    directory = sys.argv[1]
+    pairs = int(sys.argv[2]) if len(sys.argv) >= 3 else DEFAULT_PAIRS
+
+    if directory.startswith("synthetic:"):
+        edges = int(directory[len("synthetic:"):])
+        directory = f"synthetic-{edges}"
+        print(f"Generating {edges} edges in {directory}...", file=sys.stderr)
+        generate(directory, edges)
+
+    results = run(directory, pairs)
+    output = json.dumps(results, indent=2)
+    if len(sys.argv) == 4:
+        with open(sys.argv[3], "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+def run(directory, pairs=DEFAULT_PAIRS, seed=0):
+    """
+    Benchmarks loading `directory` every way it can be loaded, then the
+    latency of `pairs` random shortest-path queries, and returns the
+    results as a JSON-ready dict.
+    """
+    # Make sure a snapshot exists for the snapshot load
+    if load_snapshot(snapshot_path(directory), current_signature(directory)) is None:
+        degrees.load_data(directory, compact=True)
+
+    # Each load runs in a fresh process, so peak memory is its own
+    context = multiprocessing.get_context("spawn")
+    loads = {}
+    for mode in LOAD_MODES:
+        print(f"Timing {mode} load...", file=sys.stderr)
+        with ProcessPoolExecutor(1, mp_context=context) as pool:
+            loads[mode] = pool.submit(measure_load, mode, directory).result()
+
+    print(f"Timing {pairs} queries...", file=sys.stderr)
+    with ProcessPoolExecutor(1, mp_context=context) as pool:
+        queries = pool.submit(measure_queries, directory, pairs, seed).result()
+
+    return {
+        "directory": directory,
+        "people": queries.pop("people"),
+        "movies": queries.pop("movies"),
+        "credits": queries.pop("credits"),
+        "load": loads,
+        "queries": queries
+    }
+
+
+def measure_load(mode, directory):
+    """
+    Loads `directory` in the given mode and returns its wall time
+    and the peak resident memory of the process.
+    """
+    start = time.perf_counter()
+    if mode == "csv":
+        degrees.load_csv(directory)
+        degrees.build_graph(degrees.people, degrees.movies)
+    elif mode == "compact":
+        compact_graph(load_serial(directory))
+    elif mode == "parallel":
+        compact_graph(load_parallel(directory))
+    else:
+        load_snapshot(snapshot_path(directory), current_signature(directory))
+    seconds = time.perf_counter() - start
+    return {"seconds": seconds, "peak_rss_bytes": peak_rss()}
+
+
+def measure_queries(directory, pairs, seed):
+    """
+    Times `shortest_path` between `pairs` random pairs of credited people
+    and returns latency percentiles and the degrees found.
+    """
+    degrees.load_data(directory)
+    graph = degrees.graph
+    offsets = graph.person_offsets
+    credited = [
+        person for person in range(graph.num_people)
+        if offsets[person + 1] > offsets[person]
+    ]
+
+    rng = random.Random(seed)
+    latencies = []
+    found = {}
+    for _ in range(pairs):
+        source = graph.person_ids[rng.choice(credited)]
+        target = graph.person_ids[rng.choice(credited)]
+        start = time.perf_counter()
+        path = degrees.shortest_path(source, target)
+        latencies.append(time.perf_counter() - start)
+        key = "none" if path is None else str(len(path))
+        found[key] = found.get(key, 0) + 1
+
+    latencies.sort()
+    return {
+        "people": graph.num_people,
+        "movies": graph.num_movies,
+        "credits": len(graph.person_movies),
+        "pairs": pairs,
+        "seed": seed,
+        "latency_seconds": {
+            "mean": sum(latencies) / len(latencies) if latencies else None,
+            "p50": percentile(latencies, 50),
+            "p90": percentile(latencies, 90),
+            "p99": percentile(latencies, 99),
+            "max": latencies[-1] if latencies else None
+        },
+        "degrees": found,
+        "peak_rss_bytes": peak_rss()
+    }
+
+
+def percentile(values, p):
+    """
+    Returns the `p`th percentile of sorted `values`, by nearest rank.
+    """
+    if not values:
+        return None
+    rank = max(1, -(-p * len(values) // 100))
+    return values[rank - 1]
+
+
+def peak_rss():
+    # ru_maxrss is in kilobytes on Linux but bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,24 @@
 import csv
+import math
+import multiprocessing
+import os
 import sys
+from concurrent.futures import ProcessPoolExecutor
 
-from util import Node, StackFrontier, QueueFrontier
+import paths
+from graph import (
+    MoviesView, NamesView, PeopleView,
+    bidirectional_search, build_graph, compact_graph, merge_graph, name_key
+)
+from ingest import append_delta, load_parallel, load_serial, read_delta
+from landmarks import landmarks_path, load_landmarks, write_landmarks
+from nameindex import NameIndex
+from snapshot import (
+    current_signature, load_snapshot, snapshot_path, source_signature, write_snapshot
+)
+from util import Node, SearchStats, StackFrontier, QueueFrontier
 
-# Maps names to a set of corresponding person_ids
+# Maps name keys (lowercased, spaces collapsed) to a set of corresponding person_ids
 names = {}
 
 # Maps person_ids to a dictionary of: name, birth, movies (a set of movie_ids)
@@ -12,11 +27,93 @@ people = {}
 # Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
 movies = {}
 
+# Compact integer-indexed view of people and movies, used for searching
+graph = None
 
-def load_data(directory):
+# Prefix and fuzzy lookup over people's names
+name_index = None
+
+# Precomputed distances from landmark people, if available
+landmarks = None
+
+# Sizes and times of the CSV files, and of the deltas applied on top of them,
+# that the data was loaded from
+signature = None
+
+# Size of stars.csv, in bytes, above which the CSVs are parsed in parallel
+PARALLEL_THRESHOLD = 64 * 1024 * 1024
+
+
+def load_data(directory, workers=None, compact=False):
     """
     Load data from CSV files into memory.
+
+    After the first load a binary snapshot is saved alongside the CSV files,
+    and later loads map it straight back in instead of parsing the CSVs.
+    The snapshot is rebuilt whenever the CSV files change, and also records
+    the deltas applied since (see `apply_delta`): whenever the CSV files are
+    parsed, the recorded deltas that still exist are applied again.
+
+    Large datasets, or any dataset when `workers` is given, are parsed
+    across a pool of `workers` processes straight into the compact graph.
+
+    With `compact`, small datasets are parsed straight into the graph too.
+    Whenever the graph is loaded this way, from a snapshot or in parallel,
+    its strings are packed into shared blobs and `people`, `movies` and
+    `names` are read-only views over it instead of dicts.
+
+    The name index is ready for lookups once loaded: its trigram index is
+    saved in the snapshot too. Landmark distances saved by `landmarks.py`
+    for the same data are loaded as well.
+    """
+    global graph, names, people, movies, landmarks, name_index, signature
+
+    # Use the snapshot if it is still up to date
+    signature = current_signature(directory)
+    snapshot = load_snapshot(snapshot_path(directory), signature)
+    if snapshot is not None:
+        graph, trigrams = snapshot
+        name_index = NameIndex(graph, trigrams)
+        name_index.prepare()
+        names, people, movies = NamesView(graph), PeopleView(graph), MoviesView(graph)
+
+    # Parse big files in parallel
+    elif workers is not None or os.path.getsize(f"{directory}/stars.csv") > PARALLEL_THRESHOLD:
+        graph = compact_graph(load_parallel(directory, workers))
+        names, people, movies = NamesView(graph), PeopleView(graph), MoviesView(graph)
+
+    # Parse straight into the compact graph, without dicts
+    elif compact:
+        graph = compact_graph(load_serial(directory))
+        names, people, movies = NamesView(graph), PeopleView(graph), MoviesView(graph)
+
+    else:
+        load_csv(directory)
+        graph = build_graph(people, movies)
+
+    # Bring freshly parsed CSVs up to date with the recorded deltas
+    if snapshot is None:
+        for delta, _ in signature[1]:
+            graph, _ = merge_graph(graph, *read_delta(delta))
+            names, people, movies = NamesView(graph), PeopleView(graph), MoviesView(graph)
+        name_index = NameIndex(graph)
+        name_index.prepare()
+        save_snapshot(directory, signature)
+
+    # Pick up precomputed landmark distances if they match this data
+    landmarks = load_landmarks(landmarks_path(directory), signature)
+
+
+def load_csv(directory):
+    """
+    Load data from CSV files into the `names`, `people` and `movies` dicts.
     """
+    global names, people, movies
+
+    # Start from empty dicts if a snapshot was loaded before
+    if not isinstance(people, dict):
+        names, people, movies = {}, {}, {}
+
     # Load people
     with open(f"{directory}/people.csv", encoding="utf-8") as f:
         reader = csv.DictReader(f)
@@ -26,10 +123,11 @@ def load_data(directory):
                 "birth": row["birth"],
                 "movies": set()
             }
-            if row["name"].lower() not in names:
-                names[row["name"].lower()] = {row["id"]}
+            key = name_key(row["name"])
+            if key not in names:
+                names[key] = {row["id"]}
             else:
-                names[row["name"].lower()].add(row["id"])
+                names[key].add(row["id"])
 
     # Load movies
     with open(f"{directory}/movies.csv", encoding="utf-8") as f:
@@ -52,10 +150,94 @@ def load_data(directory):
                 pass
 
 
+def save_snapshot(directory, signature):
+    """
+    Saves a snapshot of `graph` and `name_index` for the next load
+    of `directory`. Loading still works if it cannot be saved.
+    """
+    try:
+        write_snapshot(graph, snapshot_path(directory), signature, name_index.trigrams)
+    except OSError:
+        pass
+
+
+def apply_delta(directory, delta_directory, append=False):
+    """
+    Adds the rows in the delta CSVs of `delta_directory` to the data
+    loaded from `directory`, without reloading it.
+
+    The CSV files in `directory` are left untouched: the delta is recorded
+    in the snapshot instead, which is saved again, so later loads either
+    map in the merged data or apply the delta again after parsing the CSVs.
+    Applying a delta that is already recorded, and unchanged since, does
+    nothing. With `append`, the delta rows are appended to the CSV files
+    themselves instead of being recorded.
+
+    Landmark distances are only recomputed around the movies that changed,
+    and saved again too.
+    """
+    global graph, names, people, movies, name_index, signature
+
+    delta_directory = os.path.abspath(delta_directory)
+    deltas = signature[1]
+    if not append and source_signature(directory, [delta_directory])[1][0] in deltas:
+        return
+
+    person_rows, movie_rows, star_rows = read_delta(delta_directory)
+    graph, touched_movies = merge_graph(graph, person_rows, movie_rows, star_rows)
+    names, people, movies = NamesView(graph), PeopleView(graph), MoviesView(graph)
+    name_index = NameIndex(graph)
+    name_index.prepare()
+
+    # Record the delta last, or write it into the CSV files
+    deltas = [delta for delta, _ in deltas if delta != delta_directory]
+    if append:
+        append_delta(directory, delta_directory)
+    else:
+        deltas.append(delta_directory)
+    signature = source_signature(directory, deltas)
+    save_snapshot(directory, signature)
+
+    if landmarks is not None:
+        landmarks.update(graph, touched_movies)
+        try:
+            write_landmarks(landmarks, landmarks_path(directory), signature)
+        except OSError:
+            pass
+
+
+def worker_pool(directory, workers=None):
+    """
+    Returns a pool of `workers` processes (by default, one per CPU) for
+    searching the data loaded from `directory`.
+
+    Where processes can be forked, workers share the already loaded data
+    and name index copy-on-write; otherwise each worker loads them itself,
+    from the snapshot.
+    """
+    if "fork" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("fork")
+    else:
+        context = multiprocessing.get_context()
+    return ProcessPoolExecutor(
+        workers, mp_context=context,
+        initializer=_init_worker, initargs=(directory,)
+    )
+
+
+def _init_worker(directory):
+    # Forked workers inherit the loaded graph; others load it (from the snapshot)
+    if graph is None:
+        load_data(directory)
+
+
 def main():
-    if len(sys.argv) > 2:
-        sys.exit("Usage: python degrees.py [directory]")
-    directory = sys.argv[1] if len(sys.argv) == 2 else "large"
+    # --stats reports what the search did, including its peak memory
+    stats = SearchStats(trace_memory=True) if "--stats" in sys.argv else None
+    args = [arg for arg in sys.argv if arg != "--stats"]
+    if len(args) > 2:
+        sys.exit("Usage: python degrees.py [--stats] [directory]")
+    directory = args[1] if len(args) == 2 else "large"
 
     # Load data from files into memory
     print("Loading data...")
@@ -69,7 +251,7 @@ def main():
     if target is None:
         sys.exit("Person not found.")
 
-    path = shortest_path(source, target)
+    path = shortest_path(source, target, stats)
 
     if path is None:
         print("Not connected.")
@@ -83,17 +265,96 @@ def main():
             movie = movies[path[i + 1][0]]["title"]
             print(f"{i + 1}: {person1} and {person2} starred in {movie}")
 
+    if stats is not None:
+        print(stats)
 
-def shortest_path(source, target):
+
+def shortest_path(source, target, stats=None):
     """
     Returns the shortest list of (movie_id, person_id) pairs
     that connect the source to the target.
 
     If no possible path, returns None.
+
+    Runs on the compact `graph` built by `load_data`, searching
+    breadth-first from both ends at once. The search is recorded
+    in `stats`, a `SearchStats`, if given.
     """
+    source_index = graph.person_index(source)
+    target_index = graph.person_index(target)
+    if source_index is None or target_index is None:
+        return None
+
+    path = bidirectional_search(graph, source_index, target_index, stats)
+    if path is None:
+        return None
+    return graph.id_path(path)
+
 
-    # TODO
-    raise NotImplementedError
+def all_shortest_paths(source, target):
+    """
+    Yields every shortest list of (movie_id, person_id) pairs that
+    connect the source to the target, one at a time.
+
+    Yields nothing if no possible path.
+    """
+    source_index = graph.person_index(source)
+    target_index = graph.person_index(target)
+    if source_index is None or target_index is None:
+        return
+    for path in paths.all_shortest_paths(graph, source_index, target_index):
+        yield graph.id_path(path)
+
+
+def k_shortest_paths(source, target, k=None):
+    """
+    Yields up to `k` distinct lists of (movie_id, person_id) pairs that
+    connect the source to the target, shortest first, one at a time.
+
+    Yields nothing if no possible path.
+    """
+    source_index = graph.person_index(source)
+    target_index = graph.person_index(target)
+    if source_index is None or target_index is None:
+        return
+    for path in paths.k_shortest_paths(graph, source_index, target_index, k):
+        yield graph.id_path(path)
+
+
+def separation_bounds(source, target):
+    """
+    Returns (lower, upper) bounds on the degrees of separation between
+    two person_ids, without searching. Both bounds are math.inf when the
+    people are known not to be connected.
+
+    Uses precomputed landmark distances when available; otherwise the
+    bounds are only (0, math.inf) for distinct people.
+    """
+    source_index = graph.person_index(source)
+    target_index = graph.person_index(target)
+    if source_index is None or target_index is None:
+        return math.inf, math.inf
+    if landmarks is None:
+        return (0, 0) if source_index == target_index else (0, math.inf)
+    return landmarks.bounds(source_index, target_index)
+
+
+def degrees_of_separation(source, target, stats=None):
+    """
+    Returns the number of degrees of separation between two person_ids,
+    or None if they are not connected.
+
+    Only searches the graph when landmark bounds cannot settle the answer,
+    recording the search in `stats`, a `SearchStats`, if given.
+    """
+    source_index = graph.person_index(source)
+    target_index = graph.person_index(target)
+    if source_index is None or target_index is None:
+        return None
+    if landmarks is not None:
+        return landmarks.distance(graph, source_index, target_index, stats)
+    path = bidirectional_search(graph, source_index, target_index, stats)
+    return None if path is None else len(path)
 
 
 def person_id_for_name(name):
@@ -101,7 +362,7 @@ def person_id_for_name(name):
     Returns the IMDB id for a person's name,
     resolving ambiguities as needed.
     """
-    person_ids = list(names.get(name.lower(), set()))
+    person_ids = list(names.get(name_key(name), set()))
     if len(person_ids) == 0:
         return None
     elif len(person_ids) > 1:
@@ -122,6 +383,17 @@ def person_id_for_name(name):
         return person_ids[0]
 
 
+def candidates_for_name(name, limit=10):
+    """
+    Returns up to `limit` person_ids that may be meant by `name`,
+    best match first, without asking the user to choose.
+
+    Exact matches (ignoring case) come first, then names starting
+    with `name`, then names within a couple of typos of it.
+    """
+    return [graph.person_ids[person] for person in name_index.lookup(name, limit)]
+
+
 def neighbors_for_person(person_id):
     """
     Returns (movie_id, person_id) pairs for people
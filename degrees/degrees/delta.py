@@ -0,0 +1,23 @@
+import sys
+
+import degrees
+
+
+def main():
+    if len(sys.argv) not in [3, 4] or sys.argv[3:] not in [[], ["--append"]]:
+        sys.exit("Usage: python delta.py directory delta_directory [--append]")
+    directory, delta_directory = sys.argv[1], sys.argv[2]
+    append = len(sys.argv) == 4
+
+    print("Loading data...")
+    degrees.load_data(directory)
+    print("Data loaded.")
+
+    print("Applying delta...")
+    degrees.apply_delta(directory, delta_directory, append)
+    print(f"Delta applied: {degrees.graph.num_people} people, "
+          f"{degrees.graph.num_movies} movies.")
+
+
+if __name__ == "__main__":
+    main()
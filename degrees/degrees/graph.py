@@ -0,0 +1,800 @@
+import time
+from array import array
+from bisect import bisect_left
+from collections.abc import Mapping
+from itertools import repeat
+
+
+# Graph attributes holding one string per person, movie or name
+STRING_COLUMNS = (
+    "person_ids", "movie_ids", "person_names", "person_births",
+    "movie_titles", "movie_years", "name_keys"
+)
+
+
+class Graph():
+    """
+    Compact bipartite graph of people and the movies they starred in.
+
+    People and movies are numbered 0..n-1 in sorted order of their IMDB
+    ids, except that those added later by `merge_graph` are numbered after
+    them, in the order added, and found through a dict instead of by
+    binary search. `sorted_counts` holds how many of the people and of the
+    movies are in sorted order. Edges are kept in CSR form: the movies of person `p` are
+    `person_movies[person_offsets[p]:person_offsets[p + 1]]`, and the
+    stars of movie `m` are `movie_people[movie_offsets[m]:movie_offsets[m + 1]]`.
+
+    Every column is a plain sequence, so a Graph can be backed either by
+    lists and arrays built in memory or by views into a snapshot file.
+    """
+
+    def __init__(self, person_ids, movie_ids,
+                 person_offsets, person_movies,
+                 movie_offsets, movie_people,
+                 person_names, person_births,
+                 movie_titles, movie_years,
+                 name_keys, name_offsets, name_people, sorted_counts=None):
+        self.person_ids = person_ids
+        self.movie_ids = movie_ids
+        self.person_offsets = person_offsets
+        self.person_movies = person_movies
+        self.movie_offsets = movie_offsets
+        self.movie_people = movie_people
+
+        # Per-person and per-movie string columns
+        self.person_names = person_names
+        self.person_births = person_births
+        self.movie_titles = movie_titles
+        self.movie_years = movie_years
+
+        # Sorted name keys (see `name_key`), with the people sharing each in CSR form
+        self.name_keys = name_keys
+        self.name_offsets = name_offsets
+        self.name_people = name_people
+
+        # Ids added after the sorted ones, with their indices
+        if sorted_counts is None:
+            sorted_counts = array("q", [len(person_ids), len(movie_ids)])
+        self.sorted_counts = sorted_counts
+        self.added_people = {
+            person_ids[i]: i for i in range(sorted_counts[0], len(person_ids))
+        }
+        self.added_movies = {
+            movie_ids[i]: i for i in range(sorted_counts[1], len(movie_ids))
+        }
+
+    @property
+    def num_people(self):
+        return len(self.person_ids)
+
+    @property
+    def num_movies(self):
+        return len(self.movie_ids)
+
+    def person_index(self, person_id):
+        """
+        Returns the dense index of `person_id`, or None if unknown.
+        """
+        i = _find(self.person_ids, person_id, self.sorted_counts[0])
+        return self.added_people.get(person_id) if i is None else i
+
+    def movie_index(self, movie_id):
+        """
+        Returns the dense index of `movie_id`, or None if unknown.
+        """
+        i = _find(self.movie_ids, movie_id, self.sorted_counts[1])
+        return self.added_movies.get(movie_id) if i is None else i
+
+    def movies_of(self, person):
+        """
+        Returns the movie indices a person starred in.
+        """
+        offsets = self.person_offsets
+        return self.person_movies[offsets[person]:offsets[person + 1]]
+
+    def stars_of(self, movie):
+        """
+        Returns the person indices that starred in a movie.
+        """
+        offsets = self.movie_offsets
+        return self.movie_people[offsets[movie]:offsets[movie + 1]]
+
+    def id_path(self, path):
+        """
+        Converts a path of (movie, person) indices into
+        (movie_id, person_id) pairs.
+        """
+        return [
+            (self.movie_ids[movie], self.person_ids[person])
+            for movie, person in path
+        ]
+
+    def people_named(self, name):
+        """
+        Returns the person indices whose name has the key `name`.
+        """
+        i = _find(self.name_keys, name)
+        if i is None:
+            return []
+        offsets = self.name_offsets
+        return self.name_people[offsets[i]:offsets[i + 1]]
+
+
+class StringTable():
+    """
+    Read-only sequence of strings stored as one UTF-8 blob plus
+    an array of offsets, decoded one item at a time on access.
+
+    Takes a few bytes per string beyond its text, where a list of
+    str objects costs around 60.
+    """
+
+    def __init__(self, offsets, blob):
+        self.offsets = offsets
+        self.blob = blob
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("string table index out of range")
+        return str(self.blob[self.offsets[i]:self.offsets[i + 1]], "utf-8")
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+
+def pack_strings(strings):
+    """
+    Returns a StringTable holding `strings`.
+    """
+    encoded = [string.encode("utf-8") for string in strings]
+    offsets = array("q", [0]) * (len(encoded) + 1)
+    total = 0
+    for i, item in enumerate(encoded):
+        total += len(item)
+        offsets[i + 1] = total
+    return StringTable(offsets, b"".join(encoded))
+
+
+def compact_graph(graph):
+    """
+    Returns `graph` with each string column packed into a StringTable.
+    """
+    for name in STRING_COLUMNS:
+        column = getattr(graph, name)
+        if not isinstance(column, StringTable):
+            setattr(graph, name, pack_strings(column))
+    return graph
+
+
+class PeopleView(Mapping):
+    """
+    Read-only stand-in for `degrees.people` backed by a Graph.
+
+    Maps person_ids to a dictionary of: name, birth, movies (a set of movie_ids),
+    built on access.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, person_id):
+        graph = self.graph
+        i = graph.person_index(person_id)
+        if i is None:
+            raise KeyError(person_id)
+        return {
+            "name": graph.person_names[i],
+            "birth": graph.person_births[i],
+            "movies": {graph.movie_ids[m] for m in graph.movies_of(i)}
+        }
+
+    def __iter__(self):
+        return iter(self.graph.person_ids)
+
+    def __len__(self):
+        return self.graph.num_people
+
+
+class MoviesView(Mapping):
+    """
+    Read-only stand-in for `degrees.movies` backed by a Graph.
+
+    Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids),
+    built on access.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, movie_id):
+        graph = self.graph
+        i = graph.movie_index(movie_id)
+        if i is None:
+            raise KeyError(movie_id)
+        return {
+            "title": graph.movie_titles[i],
+            "year": graph.movie_years[i],
+            "stars": {graph.person_ids[p] for p in graph.stars_of(i)}
+        }
+
+    def __iter__(self):
+        return iter(self.graph.movie_ids)
+
+    def __len__(self):
+        return self.graph.num_movies
+
+
+class NamesView(Mapping):
+    """
+    Read-only stand-in for `degrees.names` backed by a Graph.
+
+    Maps name keys (see `name_key`) to a set of corresponding person_ids.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, name):
+        graph = self.graph
+        person_indices = graph.people_named(name)
+        if len(person_indices) == 0:
+            raise KeyError(name)
+        return {graph.person_ids[p] for p in person_indices}
+
+    def __iter__(self):
+        return iter(self.graph.name_keys)
+
+    def __len__(self):
+        return len(self.graph.name_keys)
+
+
+def _find(ids, key, end=None):
+    if end is None:
+        end = len(ids)
+    i = bisect_left(ids, key, 0, end)
+    if i < end and ids[i] == key:
+        return i
+    return None
+
+
+def build_graph(people, movies):
+    """
+    Builds a Graph from the `people` and `movies` dicts
+    filled in by `degrees.load_data`.
+    """
+    star_people = []
+    star_movies = []
+    for person_id, person in people.items():
+        for movie_id in person["movies"]:
+            star_people.append(person_id)
+            star_movies.append(movie_id)
+
+    return graph_from_columns(
+        list(people),
+        [person["name"] for person in people.values()],
+        [person["birth"] for person in people.values()],
+        list(movies),
+        [movie["title"] for movie in movies.values()],
+        [movie["year"] for movie in movies.values()],
+        star_people, star_movies
+    )
+
+
+def graph_from_columns(person_ids, person_names, person_births,
+                       movie_ids, movie_titles, movie_years,
+                       star_people, star_movies):
+    """
+    Builds a Graph from parallel columns of people, movies and
+    (person_id, movie_id) star rows.
+
+    Either star column may also be given dictionary-encoded, as a
+    (values, codes) pair where row i holds values[codes[i]].
+
+    As in `degrees.load_data`, a later row for the same id replaces an
+    earlier one, and star rows naming an unknown person or movie are skipped.
+    """
+    import numpy as np
+
+    # Number people and movies in sorted id order, keeping each id's last row
+    person_rows = {person_id: i for i, person_id in enumerate(person_ids)}
+    movie_rows = {movie_id: i for i, movie_id in enumerate(movie_ids)}
+    sorted_people = sorted(person_rows)
+    sorted_movies = sorted(movie_rows)
+    person_index = {person_id: i for i, person_id in enumerate(sorted_people)}
+    movie_index = {movie_id: i for i, movie_id in enumerate(sorted_movies)}
+    num_people = len(sorted_people)
+    num_movies = len(sorted_movies)
+
+    # Look up each distinct id once, then map every star row through it
+    # (-1 for unknown ids)
+    people = _indices_of(star_people, person_index)
+    movies = _indices_of(star_movies, movie_index)
+    known = (people >= 0) & (movies >= 0)
+
+    # Pack each distinct edge into one int, ordered by person then movie
+    edges = np.sort(people[known] * num_movies + movies[known])
+    if len(edges):
+        edges = edges[np.concatenate(([True], edges[1:] != edges[:-1]))]
+    people, movies = np.divmod(edges, max(num_movies, 1))
+
+    # Person to movie edges come straight from the sorted edge list; movie
+    # to person edges are stably sorted by movie, keeping people in order
+    person_offsets = np.zeros(num_people + 1, dtype=np.int64)
+    np.cumsum(np.bincount(people, minlength=num_people), out=person_offsets[1:])
+    movie_offsets = np.zeros(num_movies + 1, dtype=np.int64)
+    np.cumsum(np.bincount(movies, minlength=num_movies), out=movie_offsets[1:])
+    movie_people = people[np.argsort(movies, kind="stable")]
+
+    sorted_names = [person_names[person_rows[person_id]] for person_id in sorted_people]
+    return Graph(
+        sorted_people, sorted_movies,
+        _to_array("q", person_offsets), _to_array("i", movies),
+        _to_array("q", movie_offsets), _to_array("i", movie_people),
+        sorted_names,
+        [person_births[person_rows[person_id]] for person_id in sorted_people],
+        [movie_titles[movie_rows[movie_id]] for movie_id in sorted_movies],
+        [movie_years[movie_rows[movie_id]] for movie_id in sorted_movies],
+        *_name_index(sorted_names)
+    )
+
+
+def _indices_of(column, index):
+    """
+    Returns an int64 array of the index in `index` of each id in `column`,
+    a list of ids or a (values, codes) pair, with -1 for unknown ids.
+    """
+    import numpy as np
+    if not isinstance(column, tuple):
+        return np.fromiter(
+            map(index.get, column, repeat(-1)), dtype=np.int64, count=len(column)
+        )
+    values, codes = column
+    lookup = np.fromiter(
+        map(index.get, values, repeat(-1)), dtype=np.int64, count=len(values)
+    )
+    return lookup[np.asarray(codes, dtype=np.int64)]
+
+
+def merge_graph(graph, person_rows, movie_rows, star_rows):
+    """
+    Returns a new Graph with rows added to `graph`, without rebuilding it
+    from scratch, along with the sorted indices of movies that gained stars.
+
+    `person_rows` holds (id, name, birth), `movie_rows` (id, title, year)
+    and `star_rows` (person_id, movie_id) tuples. Rows for ids already in
+    the graph replace their fields; unknown star rows are skipped.
+
+    Old people and movies keep their indices and new ones are numbered
+    after them, so only the rows that change are rebuilt: every other run
+    of rows is copied across in one piece.
+    """
+    person_rows = {row[0]: row[1:] for row in person_rows}
+    movie_rows = {row[0]: row[1:] for row in movie_rows}
+    num_people, num_movies = graph.num_people, graph.num_movies
+    person_numbers = _number(person_rows, graph.person_index, num_people)
+    movie_numbers = _number(movie_rows, graph.movie_index, num_movies)
+
+    def spliced(column, numbers, rows, count, field=None):
+        # `column` with the rows' field, or with new ids if `field` is None
+        edits = sorted(
+            (numbers[i], i if field is None else rows[i][field], numbers[i] < count)
+            for i in rows if field is not None or numbers[i] >= count
+        )
+        return _splice_strings(column, _pieces(count, edits))
+
+    person_ids = spliced(graph.person_ids, person_numbers, person_rows, num_people)
+    movie_ids = spliced(graph.movie_ids, movie_numbers, movie_rows, num_movies)
+    person_names = spliced(graph.person_names, person_numbers, person_rows, num_people, 0)
+    person_births = spliced(graph.person_births, person_numbers, person_rows, num_people, 1)
+    movie_titles = spliced(graph.movie_titles, movie_numbers, movie_rows, num_movies, 0)
+    movie_years = spliced(graph.movie_years, movie_numbers, movie_rows, num_movies, 1)
+
+    # Work out which star rows are genuinely new edges
+    added = {}
+    for person_id, movie_id in star_rows:
+        person = person_numbers.get(person_id, graph.person_index(person_id))
+        movie = movie_numbers.get(movie_id, graph.movie_index(movie_id))
+        if person is None or movie is None:
+            continue
+        if person < num_people and movie < num_movies and movie in graph.movies_of(person):
+            continue
+        added.setdefault(person, set()).add(movie)
+    added_by_movie = {}
+    for person, movies in added.items():
+        for movie in movies:
+            added_by_movie.setdefault(movie, set()).add(person)
+
+    person_offsets, person_movies = _splice_csr(
+        graph.person_offsets, graph.person_movies,
+        _pieces(num_people, _row_edits(graph.movies_of, added, num_people, len(person_ids)))
+    )
+    movie_offsets, movie_people = _splice_csr(
+        graph.movie_offsets, graph.movie_people,
+        _pieces(num_movies, _row_edits(graph.stars_of, added_by_movie, num_movies, len(movie_ids)))
+    )
+
+    renamed = {
+        person_numbers[i]: row[0] for i, row in person_rows.items()
+        if person_numbers[i] >= num_people or row[0] != graph.person_names[person_numbers[i]]
+    }
+    merged = Graph(
+        person_ids, movie_ids,
+        person_offsets, person_movies,
+        movie_offsets, movie_people,
+        person_names, person_births, movie_titles, movie_years,
+        *_merge_names(graph, renamed),
+        array("q", graph.sorted_counts)
+    )
+    return merged, sorted(added_by_movie)
+
+
+def _number(rows, index_of, count):
+    """
+    Maps each id in `rows` to its index: the one it already has, or else
+    the next one after `count`, taken in id order.
+    """
+    numbers = {}
+    for i in sorted(rows):
+        index = index_of(i)
+        if index is None:
+            index = count
+            count += 1
+        numbers[i] = index
+    return numbers
+
+
+def _row_edits(neighbors_of, added, count, new_count):
+    """
+    Returns the edits for `_pieces` that give each row in `added` its old
+    neighbors plus the new ones, sorted, and add a row for each new index
+    up to `new_count`.
+    """
+    edits = [
+        (row, sorted([*neighbors_of(row), *added[row]]), True)
+        for row in sorted(added) if row < count
+    ]
+    edits.extend(
+        (row, sorted(added.get(row, ())), False) for row in range(count, new_count)
+    )
+    return edits
+
+
+def _merge_names(graph, renamed):
+    """
+    Returns the graph's name index, as `_name_index` does, updated for
+    the people in `renamed`, which maps person indices, old or new, to
+    their new names. Only the names involved are regrouped.
+    """
+    keys = graph.name_keys
+    groups = {}
+
+    def group(key):
+        if key not in groups:
+            groups[key] = list(graph.people_named(key))
+        return groups[key]
+
+    for person, name in renamed.items():
+        if person < graph.num_people:
+            group(name_key(graph.person_names[person])).remove(person)
+        group(name_key(name)).append(person)
+
+    # Names left with nobody are dropped, and new names inserted in order
+    edits = []
+    for key in sorted(groups):
+        i = bisect_left(keys, key)
+        exists = i < len(keys) and keys[i] == key
+        people = sorted(groups[key])
+        edits.append((i, (key, people) if people else None, exists))
+    pieces = _pieces(len(keys), edits)
+
+    name_keys = _splice_strings(keys, [
+        piece if isinstance(piece, range) else piece[0] for piece in pieces
+    ])
+    name_offsets, name_people = _splice_csr(graph.name_offsets, graph.name_people, [
+        piece if isinstance(piece, range) else piece[1] for piece in pieces
+    ])
+    return name_keys, name_offsets, name_people
+
+
+def _pieces(count, edits):
+    """
+    Turns `edits`, sorted (row, value, replace) tuples, into the pieces of
+    a column of `count` rows: a range of old rows kept as they are, or a
+    new value. Each value goes in before old row `row` (at the end, for
+    rows from `count` on), or in its place if `replace` is set; a value of
+    None just drops that row.
+    """
+    pieces = []
+    start = 0
+    for row, value, replace in edits:
+        if start < min(row, count):
+            pieces.append(range(start, min(row, count)))
+        if value is not None:
+            pieces.append(value)
+        start = row + 1 if replace else row
+    if start < count:
+        pieces.append(range(start, count))
+    return pieces
+
+
+def _splice_strings(column, pieces):
+    """
+    Builds a string column, of the same kind as `column`, from `pieces`
+    (see `_pieces`): ranges of its rows, or new strings. A StringTable's
+    ranges are copied across as whole runs of its blob.
+    """
+    if not isinstance(column, StringTable):
+        strings = []
+        for piece in pieces:
+            if isinstance(piece, range):
+                strings.extend(column[piece.start:piece.stop])
+            else:
+                strings.append(piece)
+        return strings
+
+    import numpy as np
+    offsets = np.asarray(column.offsets, dtype=np.int64)
+    blob = memoryview(column.blob)
+    lengths = [[0]]
+    chunks = []
+    for piece in pieces:
+        if isinstance(piece, range):
+            lengths.append(np.diff(offsets[piece.start:piece.stop + 1]))
+            chunks.append(blob[offsets[piece.start]:offsets[piece.stop]])
+        else:
+            encoded = piece.encode("utf-8")
+            lengths.append([len(encoded)])
+            chunks.append(encoded)
+    offsets = np.cumsum(np.concatenate(lengths), dtype=np.int64)
+    return StringTable(_to_array("q", offsets), b"".join(chunks))
+
+
+def _splice_csr(offsets, indices, pieces):
+    """
+    Builds CSR offset and index arrays from `pieces` (see `_pieces`):
+    ranges of the old rows, copied across in one go, or new rows.
+    """
+    import numpy as np
+    offsets = np.asarray(offsets, dtype=np.int64)
+    indices = np.asarray(indices, dtype=np.int32)
+    counts = [[0]]
+    chunks = [np.zeros(0, dtype=np.int32)]
+    for piece in pieces:
+        if isinstance(piece, range):
+            counts.append(np.diff(offsets[piece.start:piece.stop + 1]))
+            chunks.append(indices[offsets[piece.start]:offsets[piece.stop]])
+        else:
+            counts.append([len(piece)])
+            chunks.append(np.asarray(piece, dtype=np.int32))
+    return (
+        _to_array("q", np.cumsum(np.concatenate(counts), dtype=np.int64)),
+        _to_array("i", np.concatenate(chunks))
+    )
+
+
+def _to_array(typecode, values):
+    # Copies a NumPy array into the kind of array Graph columns are made of
+    result = array(typecode)
+    result.frombytes(values.astype(typecode, copy=False).tobytes())
+    return result
+
+
+def name_key(name):
+    """
+    Returns the key `name` is indexed under: lowercased, with runs of
+    whitespace collapsed to single spaces.
+    """
+    return " ".join(name.lower().split())
+
+
+def _name_index(person_names):
+    """
+    Groups person indices by name key, returning the sorted
+    keys and, in CSR form, the people sharing each one.
+    """
+    import numpy as np
+    keys = list(map(name_key, person_names))
+    name_keys = sorted(set(keys))
+    rank = {key: i for i, key in enumerate(name_keys)}
+    ranks = np.fromiter(map(rank.__getitem__, keys), dtype=np.int64, count=len(keys))
+
+    # People in order within each key, as a stable sort by key keeps them
+    name_offsets = np.zeros(len(name_keys) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(ranks, minlength=len(name_keys)), out=name_offsets[1:])
+    name_people = np.argsort(ranks, kind="stable")
+    return name_keys, _to_array("q", name_offsets), _to_array("i", name_people)
+
+
+def bidirectional_search(graph, source, target, stats=None):
+    """
+    Returns the shortest list of (movie, person) index pairs that
+    connect person `source` to person `target`, or None.
+    The search is recorded in `stats`, a `SearchStats`, if given.
+
+    Grows a breadth-first search from both ends, always expanding
+    a whole layer of the side with the smaller frontier. Each side
+    expands a movie's cast at most once, since every star of a movie
+    is reached the first time any of them is.
+    """
+    if source == target:
+        return []
+
+    person_offsets = graph.person_offsets
+    person_movies = graph.person_movies
+    movie_offsets = graph.movie_offsets
+    movie_people = graph.movie_people
+
+    parents = ({source: None}, {target: None})
+    depths = ({source: 0}, {target: 0})
+    expanded = (set(), set())
+    frontiers = ([source], [target])
+
+    if stats is not None:
+        stats.start()
+    try:
+        while frontiers[0] and frontiers[1]:
+            if stats is not None:
+                layer_started = time.perf_counter()
+            side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+            other = 1 - side
+            parent, depth, seen = parents[side], depths[side], expanded[side]
+            other_parent, other_depth = parents[other], depths[other]
+
+            meeting = None
+            next_frontier = []
+            for person in frontiers[side]:
+                next_depth = depth[person] + 1
+                for i in range(person_offsets[person], person_offsets[person + 1]):
+                    movie = person_movies[i]
+                    if movie in seen:
+                        continue
+                    seen.add(movie)
+                    for j in range(movie_offsets[movie], movie_offsets[movie + 1]):
+                        neighbor = movie_people[j]
+                        if neighbor in parent:
+                            continue
+                        parent[neighbor] = (movie, person)
+                        depth[neighbor] = next_depth
+                        next_frontier.append(neighbor)
+                        if neighbor in other_parent and (
+                            meeting is None
+                            or other_depth[neighbor] < other_depth[meeting]
+                        ):
+                            meeting = neighbor
+
+            if stats is not None:
+                stats.layer(
+                    len(frontiers[side]),
+                    len(frontiers[0]) + len(frontiers[1]),
+                    time.perf_counter() - layer_started
+                )
+
+            if meeting is not None:
+                return join_paths(parents[0], parents[1], meeting)
+
+            frontiers = (
+                (next_frontier, frontiers[1]) if side == 0
+                else (frontiers[0], next_frontier)
+            )
+
+        return None
+    finally:
+        if stats is not None:
+            stats.stop()
+
+
+def bfs_tree(graph, source, targets=None):
+    """
+    Runs a breadth-first search from person `source` and returns a dict
+    mapping each reached person to the (movie, person) step that reached it.
+    Each movie's cast is expanded at most once.
+
+    If `targets` is given, stops as soon as every target has been reached.
+    """
+    person_offsets = graph.person_offsets
+    person_movies = graph.person_movies
+    movie_offsets = graph.movie_offsets
+    movie_people = graph.movie_people
+
+    parent = {source: None}
+    expanded = set()
+    remaining = None if targets is None else set(targets) - {source}
+    frontier = [source]
+    while frontier and remaining != set():
+        next_frontier = []
+        for person in frontier:
+            for i in range(person_offsets[person], person_offsets[person + 1]):
+                movie = person_movies[i]
+                if movie in expanded:
+                    continue
+                expanded.add(movie)
+                for j in range(movie_offsets[movie], movie_offsets[movie + 1]):
+                    neighbor = movie_people[j]
+                    if neighbor in parent:
+                        continue
+                    parent[neighbor] = (movie, person)
+                    next_frontier.append(neighbor)
+                    if remaining is not None:
+                        remaining.discard(neighbor)
+        frontier = next_frontier
+    return parent
+
+
+def bfs_distances(graph, source):
+    """
+    Returns an array holding every person's number of degrees of
+    separation from person `source`, or -1 for people not connected to it.
+    """
+    person_offsets = graph.person_offsets
+    person_movies = graph.person_movies
+    movie_offsets = graph.movie_offsets
+    movie_people = graph.movie_people
+
+    distances = array("h", [-1]) * graph.num_people
+    expanded = bytearray(graph.num_movies)
+    distances[source] = 0
+    frontier = [source]
+    depth = 0
+    while frontier:
+        depth += 1
+        next_frontier = []
+        for person in frontier:
+            for i in range(person_offsets[person], person_offsets[person + 1]):
+                movie = person_movies[i]
+                if expanded[movie]:
+                    continue
+                expanded[movie] = 1
+                for j in range(movie_offsets[movie], movie_offsets[movie + 1]):
+                    neighbor = movie_people[j]
+                    if distances[neighbor] < 0:
+                        distances[neighbor] = depth
+                        next_frontier.append(neighbor)
+        frontier = next_frontier
+    return distances
+
+
+def tree_path(parent, target):
+    """
+    Returns the (movie, person) path to `target` in a tree from
+    `bfs_tree`, or None if the target was not reached.
+    """
+    if target not in parent:
+        return None
+    path = []
+    while parent[target] is not None:
+        movie, previous = parent[target]
+        path.append((movie, target))
+        target = previous
+    path.reverse()
+    return path
+
+
+def join_paths(forward, backward, meeting):
+    """
+    Builds the (movie, person) path through `meeting` out of
+    the parent maps grown from the source and from the target.
+    """
+
+    # Walk back from the meeting point to the source
+    path = []
+    person = meeting
+    while forward[person] is not None:
+        movie, previous = forward[person]
+        path.append((movie, person))
+        person = previous
+    path.reverse()
+
+    # Walk on from the meeting point to the target
+    person = meeting
+    while backward[person] is not None:
+        movie, following = backward[person]
+        path.append((movie, following))
+        person = following
+
+    return path
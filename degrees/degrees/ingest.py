@@ -0,0 +1,213 @@
+import csv
+import io
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+from graph import graph_from_columns
+
+# Target size of each byte range handed to a worker
+CHUNK_SIZE = 16 * 1024 * 1024
+
+# Each source CSV and the columns read from it
+TABLES = (
+    ("people.csv", ("id", "name", "birth")),
+    ("movies.csv", ("id", "title", "year")),
+    ("stars.csv", ("person_id", "movie_id"))
+)
+
+# Columns whose ids repeat from row to row, so workers send them back
+# dictionary-encoded rather than as one string per row
+ENCODED_COLUMNS = ("person_id", "movie_id")
+
+
+def load_serial(directory):
+    """
+    Parses people.csv, movies.csv and stars.csv in `directory` straight
+    into columns, without a dict per row, and returns the resulting Graph.
+    """
+    columns = []
+    for filename, fields in TABLES:
+        columns.extend(read_table(os.path.join(directory, filename), fields))
+    return graph_from_columns(*columns)
+
+
+def load_parallel(directory, workers=None, chunk_size=CHUNK_SIZE):
+    """
+    Parses people.csv, movies.csv and stars.csv in `directory` across
+    a process pool and returns the resulting Graph.
+
+    Each file is cut into byte ranges that end on line boundaries, so rows
+    must not contain embedded newlines (IMDB exports do not).
+    """
+    columns = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for filename, fields in TABLES:
+            columns.extend(read_columns(
+                pool, os.path.join(directory, filename), fields, chunk_size
+            ))
+    return graph_from_columns(*columns)
+
+
+def read_table(path, fields):
+    """
+    Returns one list per name in `fields`, holding that column
+    of the CSV file at `path`.
+    """
+    with open(path, encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        positions = _positions(path, next(reader, []), fields)
+        columns = [[] for _ in fields]
+        appends = [column.append for column in columns]
+        for row in reader:
+            if not row:
+                continue
+            for append, position in zip(appends, positions):
+                append(row[position])
+    return columns
+
+
+def read_columns(pool, path, fields, chunk_size=CHUNK_SIZE):
+    """
+    Returns one column per name in `fields`, holding that column of the
+    CSV file at `path`, parsed chunk by chunk on `pool`.
+
+    Columns in ENCODED_COLUMNS come back as a (values, codes) pair, where
+    row i holds values[codes[i]] (see `graph.graph_from_columns`); the rest
+    are lists.
+    """
+    import numpy as np
+    with open(path, "rb") as f:
+        header = f.readline()
+    positions = _positions(path, next(csv.reader([header.decode("utf-8")])), fields)
+    encoded = [field in ENCODED_COLUMNS for field in fields]
+
+    futures = [
+        pool.submit(parse_range, path, start, end, positions, encoded)
+        for start, end in chunk_ranges(path, len(header), chunk_size)
+    ]
+
+    # Merge in file order so later rows still win over earlier ones; each
+    # chunk's codes are shifted past the values of the chunks before it
+    columns = [([], []) if encode else [] for encode in encoded]
+    for future in futures:
+        for column, part in zip(columns, future.result()):
+            if isinstance(column, tuple):
+                values, codes = column
+                codes.append(np.frombuffer(part[1], dtype=np.int32) + np.int64(len(values)))
+                values.extend(part[0])
+            else:
+                column.extend(part)
+    for i, column in enumerate(columns):
+        if isinstance(column, tuple):
+            values, codes = column
+            columns[i] = (values, np.concatenate(codes or [np.zeros(0, dtype=np.int64)]))
+    return columns
+
+
+def _positions(path, header, fields):
+    # Finds where each of `fields` is in a CSV header row
+    try:
+        return [header.index(field) for field in fields]
+    except ValueError:
+        raise Exception(f"{path} must have columns {', '.join(fields)}")
+
+
+def chunk_ranges(path, start, chunk_size=CHUNK_SIZE):
+    """
+    Splits the file at `path` from byte `start` on into (start, end)
+    ranges of roughly `chunk_size` bytes that each end after a newline.
+    """
+    size = os.path.getsize(path)
+    ranges = []
+    with open(path, "rb") as f:
+        while start < size:
+            end = start + chunk_size
+            if end < size:
+                f.seek(end)
+                f.readline()
+                end = f.tell()
+            else:
+                end = size
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+
+def parse_range(path, start, end, positions, encoded=None):
+    """
+    Parses the rows between bytes `start` and `end` of a CSV file and
+    returns the columns at `positions`, one list per column.
+
+    Columns flagged in `encoded` are returned dictionary-encoded instead,
+    as the list of their distinct values and an int32 array of each row's
+    index into it, which is far cheaper to send back from a worker.
+    """
+    with open(path, "rb") as f:
+        f.seek(start)
+        text = f.read(end - start).decode("utf-8")
+
+    columns = [[] for _ in positions]
+    appends = [column.append for column in columns]
+    for row in csv.reader(io.StringIO(text, newline="")):
+        if not row:
+            continue
+        for append, position in zip(appends, positions):
+            append(row[position])
+
+    for i, encode in enumerate(encoded or []):
+        if encode:
+            codes = {}
+            indices = array("i", [codes.setdefault(value, len(codes)) for value in columns[i]])
+            columns[i] = (list(codes), indices)
+    return columns
+
+
+def read_delta(directory):
+    """
+    Reads whichever of people.csv, movies.csv and stars.csv exist in a
+    delta `directory`, returning lists of (id, name, birth), (id, title, year)
+    and (person_id, movie_id) rows.
+    """
+    rows = []
+    for filename, fields in TABLES:
+        path = os.path.join(directory, filename)
+        if os.path.exists(path):
+            rows.append(list(zip(*read_table(path, fields))))
+        else:
+            rows.append([])
+    return rows
+
+
+def append_delta(directory, delta_directory):
+    """
+    Appends the rows of each delta CSV to the matching CSV in `directory`.
+
+    Delta columns are matched to the base file's by name, as `read_delta`
+    does, and written in the base file's order; columns the delta lacks
+    are left empty.
+    """
+    for filename, fields in TABLES:
+        delta_path = os.path.join(delta_directory, filename)
+        if not os.path.exists(delta_path):
+            continue
+        path = os.path.join(directory, filename)
+        with open(path, encoding="utf-8", newline="") as f:
+            header = next(csv.reader(f), [])
+        _positions(path, header, fields)
+        with open(delta_path, encoding="utf-8", newline="") as f:
+            reader = csv.DictReader(f)
+            _positions(delta_path, reader.fieldnames or [], fields)
+            rows = [[row.get(column) or "" for column in header] for row in reader]
+        if not rows:
+            continue
+
+        # Start on a new line even if the file does not end with one
+        with open(path, "rb+") as f:
+            f.seek(0, os.SEEK_END)
+            if f.tell() > 0:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    f.write(b"\n")
+        with open(path, "a", encoding="utf-8", newline="") as f:
+            csv.writer(f, lineterminator="\n").writerows(rows)
@@ -0,0 +1,224 @@
+import math
+import os
+import struct
+import sys
+from array import array
+
+from graph import bfs_distances, bidirectional_search
+from snapshot import SOURCE_FILES, pack_deltas, unpack_deltas
+
+LANDMARKS_NAME = "degrees.landmarks"
+DEFAULT_COUNT = 16
+
+MAGIC = b"DEGLMRK\0"
+VERSION = 2
+
+# Header: magic, version, landmark count, people count, size of the delta log
+# in bytes, then the source files' signature; the delta log follows
+HEADER = struct.Struct("<8sIIqq" + "qq" * len(SOURCE_FILES))
+
+
+class Landmarks():
+    """
+    Distances from a few landmark people to everyone else, used to
+    bound the degrees of separation between any two people without searching.
+    """
+
+    def __init__(self, people, distances):
+        # Person indices of the landmarks, and one distance array per landmark
+        self.people = people
+        self.distances = distances
+
+    def bounds(self, source, target):
+        """
+        Returns (lower, upper) bounds on the degrees of separation between
+        person indices `source` and `target`. Either bound is math.inf
+        when the landmarks show the two people are not connected.
+        """
+        if source == target:
+            return 0, 0
+
+        lower, upper = 0, math.inf
+        for distances in self.distances:
+            to_source, to_target = distances[source], distances[target]
+
+            # A landmark reaching only one of them puts them in different components
+            if (to_source < 0) != (to_target < 0):
+                return math.inf, math.inf
+            if to_source < 0:
+                continue
+            lower = max(lower, abs(to_source - to_target))
+            upper = min(upper, to_source + to_target)
+        return lower, upper
+
+    def distance(self, graph, source, target, stats=None):
+        """
+        Returns the degrees of separation between person indices `source`
+        and `target`, or None if they are not connected.
+
+        Only searches the graph when the landmark bounds disagree, recording
+        the search in `stats` if given.
+        """
+        lower, upper = self.bounds(source, target)
+        if lower == upper:
+            return None if lower == math.inf else lower
+        path = bidirectional_search(graph, source, target, stats)
+        return None if path is None else len(path)
+
+
+    def update(self, graph, touched_movies):
+        """
+        Brings the tables up to date with `graph`, a merge of the graph
+        they were computed on (see `graph.merge_graph`).
+
+        People keep their indices in a merge, so each table is just extended
+        for the new people. Since new credits can only bring people closer,
+        distances are then lowered outward from the casts of `touched_movies`
+        only, leaving the rest of each table as it was. Returns how many
+        landmarks changed.
+        """
+        changed = 0
+        for k, old in enumerate(self.distances):
+            distances = array("h", old)
+            distances.extend(array("h", [-1]) * (graph.num_people - len(old)))
+            self.distances[k] = distances
+            if _lower_distances(graph, distances, touched_movies):
+                changed += 1
+        return changed
+
+
+def _lower_distances(graph, distances, movies):
+    """
+    Lowers `distances` from one landmark to account for new credits in
+    `movies`, visiting only the people whose distance actually drops.
+    Returns whether anything changed.
+    """
+    buckets = {}
+
+    def lower(person, distance):
+        if distances[person] < 0 or distances[person] > distance:
+            distances[person] = distance
+            buckets.setdefault(distance, []).append(person)
+
+    # Every star of a movie is at most one step from its closest star
+    for movie in movies:
+        stars = graph.stars_of(movie)
+        reached = [distances[person] for person in stars if distances[person] >= 0]
+        if reached:
+            closest = min(reached)
+            for person in stars:
+                lower(person, closest + 1)
+
+    # Carry the improvements outward in order of distance
+    changed = bool(buckets)
+    while buckets:
+        distance = min(buckets)
+        for person in buckets.pop(distance):
+            if distances[person] != distance:
+                continue
+            for movie in graph.movies_of(person):
+                for neighbor in graph.stars_of(movie):
+                    lower(neighbor, distance + 1)
+    return changed
+
+
+def choose_landmarks(graph, count=DEFAULT_COUNT):
+    """
+    Returns the indices of the `count` people with the most
+    co-star links, counting each shared movie's cast.
+    """
+    movie_offsets = graph.movie_offsets
+    links = []
+    for person in range(graph.num_people):
+        total = 0
+        for movie in graph.movies_of(person):
+            total += movie_offsets[movie + 1] - movie_offsets[movie]
+        links.append(total)
+    ranked = sorted(range(graph.num_people), key=links.__getitem__, reverse=True)
+    return ranked[:count]
+
+
+def compute_landmarks(graph, count=DEFAULT_COUNT):
+    """
+    Chooses landmarks and runs a full breadth-first search from each one.
+    """
+    people = choose_landmarks(graph, count)
+    return Landmarks(people, [bfs_distances(graph, person) for person in people])
+
+
+def landmarks_path(directory):
+    return os.path.join(directory, LANDMARKS_NAME)
+
+
+def write_landmarks(landmarks, path, signature):
+    """
+    Writes the landmark tables to `path`, tagged with the signature of
+    the source files and deltas they were computed from.
+    """
+    num_people = len(landmarks.distances[0]) if landmarks.distances else 0
+    files, deltas = signature
+    log = pack_deltas(deltas)
+    temporary = f"{path}.tmp{os.getpid()}"
+    with open(temporary, "wb") as f:
+        f.write(HEADER.pack(
+            MAGIC, VERSION, len(landmarks.people), num_people, len(log), *files
+        ))
+        f.write(log)
+        f.write(array("i", landmarks.people).tobytes())
+        for distances in landmarks.distances:
+            f.write(array("h", distances).tobytes())
+    os.replace(temporary, path)
+
+
+def load_landmarks(path, signature):
+    """
+    Returns the Landmarks stored at `path`, or None if there are none
+    or they were computed from source files or deltas that no longer
+    match `signature`.
+    """
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        return None
+    with f:
+        header = f.read(HEADER.size)
+        if len(header) < HEADER.size:
+            return None
+        magic, version, count, num_people, log_size, *stored = HEADER.unpack(header)
+        if magic != MAGIC or version != VERSION:
+            return None
+        if (tuple(stored), unpack_deltas(f.read(log_size))) != signature:
+            return None
+
+        people = array("i")
+        distances = []
+        try:
+            people.fromfile(f, count)
+            for _ in range(count):
+                table = array("h")
+                table.fromfile(f, num_people)
+                distances.append(table)
+        except EOFError:
+            return None
+    return Landmarks(list(people), distances)
+
+
+def main():
+    if len(sys.argv) not in [2, 3]:
+        sys.exit("Usage: python landmarks.py directory [count]")
+    directory = sys.argv[1]
+    count = int(sys.argv[2]) if len(sys.argv) == 3 else DEFAULT_COUNT
+
+    import degrees
+    print("Loading data...")
+    degrees.load_data(directory)
+    print("Data loaded.")
+
+    print(f"Computing {count} landmarks...")
+    landmarks = compute_landmarks(degrees.graph, count)
+    write_landmarks(landmarks, landmarks_path(directory), degrees.signature)
+    print(f"Landmarks saved to {landmarks_path(directory)}.")
+
+
+if __name__ == "__main__":
+    main()
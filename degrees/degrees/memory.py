@@ -0,0 +1,69 @@
+import gc
+import multiprocessing
+import os
+import sys
+import tracemalloc
+
+import degrees
+from graph import compact_graph
+from ingest import load_serial
+from snapshot import current_signature, load_snapshot, snapshot_path
+
+
+def main():
+    if len(sys.argv) != 2:
+        sys.exit("Usage: python memory.py directory")
+    directory = sys.argv[1]
+
+    # Measure each mode in a fresh process so they cannot share memory
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(1, maxtasksperchild=1) as pool:
+        results = {
+            mode: pool.apply(measure, (mode, directory))
+            for mode in ("dicts", "compact", "snapshot")
+        }
+
+    print(f"{'mode':<10}{'retained':>14}{'peak':>14}")
+    for mode, (retained, peak) in results.items():
+        print(f"{mode:<10}{format_bytes(retained):>14}{format_bytes(peak):>14}")
+
+    dicts, compact = results["dicts"][0], results["compact"][0]
+    print(f"Compact mode uses {dicts / max(compact, 1):.1f}x less memory than dicts.")
+    path = snapshot_path(directory)
+    if os.path.exists(path):
+        print(f"The snapshot maps {format_bytes(os.path.getsize(path))} from disk on demand.")
+
+
+def measure(mode, directory):
+    """
+    Loads `directory` in the given mode and returns the bytes of Python
+    memory retained afterwards, and the peak while loading.
+    """
+    tracemalloc.start()
+    if mode == "dicts":
+        degrees.load_csv(directory)
+        data = (degrees.people, degrees.movies, degrees.names,
+                degrees.build_graph(degrees.people, degrees.movies))
+    elif mode == "compact":
+        data = compact_graph(load_serial(directory))
+    else:
+        data = load_snapshot(snapshot_path(directory), current_signature(directory))
+        if data is None:
+            data = compact_graph(load_serial(directory))
+    gc.collect()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del data
+    return retained, peak
+
+
+def format_bytes(size):
+    for unit in ("B", "KiB", "MiB"):
+        if size < 1024:
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GiB"
+
+
+if __name__ == "__main__":
+    main()
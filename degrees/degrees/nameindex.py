@@ -0,0 +1,234 @@
+from bisect import bisect_left
+
+from graph import name_key
+
+# How many of a query's rarest trigrams are used to gather fuzzy candidates
+PROBE_TRIGRAMS = 6
+
+# How many gathered candidates are scored by edit distance
+SCORED_CANDIDATES = 64
+
+
+class NameIndex():
+    """
+    Prefix and typo-tolerant lookup over the name keys of a Graph.
+
+    Prefix lookups binary-search the graph's sorted `name_keys` directly,
+    then rank the whole matching range by each key's score: the most
+    movies anyone with that name starred in. Fuzzy lookups use a trigram
+    index over the same keys, given as the (codes, offsets, keys) arrays
+    of `build_trigrams` when already known, as from a snapshot. Scores and
+    trigrams are each computed the first time they are needed, unless
+    prepared up front, and kept for the life of the index.
+    """
+
+    def __init__(self, graph, trigrams=None):
+        self.graph = graph
+        self.scores = None
+        self.trigrams = trigrams
+
+    def prepare(self):
+        """
+        Computes key scores and the trigram index now rather than on the
+        first prefix or fuzzy lookup.
+        """
+        self._prepare_scores()
+        self._prepare_trigrams()
+
+    def exact(self, name):
+        """
+        Returns the person indices named exactly `name`, ignoring case,
+        most prolific first.
+        """
+        return self._ranked(self.graph.people_named(name_key(name)))
+
+    def prefix(self, prefix, limit=10):
+        """
+        Returns up to `limit` person indices whose name starts with
+        `prefix`, ignoring case, most prolific first.
+        """
+        import numpy as np
+        graph = self.graph
+        keys = graph.name_keys
+        prefix = name_key(prefix)
+        start = bisect_left(keys, prefix)
+        end = bisect_left(keys, prefix + "\U0010ffff", lo=start)
+
+        # The `limit` most prolific people all have names among the
+        # `limit` best-scored keys, however many keys match
+        scores = self._prepare_scores()[start:end]
+        if len(scores) > limit:
+            best = start + np.argpartition(scores, -limit)[-limit:]
+        else:
+            best = range(start, end)
+
+        offsets = graph.name_offsets
+        people = []
+        for key in best:
+            people.extend(graph.name_people[offsets[key]:offsets[key + 1]])
+        return self._ranked(people)[:limit]
+
+    def fuzzy(self, name, limit=10, max_distance=2):
+        """
+        Returns up to `limit` person indices whose name is within
+        `max_distance` edits of `name`, closest and most prolific first.
+        """
+        import numpy as np
+        query = name_key(name)
+        codes, offsets, posted = self._prepare_trigrams()
+
+        # Find the query's trigrams that occur in any key
+        wanted = np.unique(trigram_codes(trigrams_of(query)))
+        found = np.minimum(np.searchsorted(codes, wanted), max(len(codes) - 1, 0))
+        found = found[codes[found] == wanted] if len(codes) else found[:0]
+
+        # Count shared trigrams, probing only the query's rarest ones
+        starts, ends = offsets[found], offsets[found + 1]
+        rarest = np.argsort(ends - starts, kind="stable")[:PROBE_TRIGRAMS]
+        postings = [posted[starts[t]:ends[t]] for t in rarest]
+        if not postings:
+            return []
+        posted_keys = np.sort(np.concatenate(postings))
+        runs = np.flatnonzero(_first_of_runs(posted_keys))
+        candidates = posted_keys[runs]
+        shared = np.diff(np.append(runs, len(posted_keys)))
+        if len(candidates) > SCORED_CANDIDATES:
+            best = np.argpartition(shared, -SCORED_CANDIDATES)
+            candidates = candidates[best[-SCORED_CANDIDATES:]]
+
+        keys = self.graph.name_keys
+        scored = []
+        for key in candidates.tolist():
+            distance = edit_distance(query, keys[key], max_distance)
+            if distance <= max_distance:
+                scored.append((distance, key))
+        scored.sort()
+
+        people = []
+        for distance, key in scored:
+            people.extend(self._ranked(self.graph.people_named(keys[key])))
+        return people[:limit]
+
+    def lookup(self, name, limit=10):
+        """
+        Returns up to `limit` ranked person indices for `name`: exact
+        matches, then names starting with it, then near misses if there
+        is no exact match.
+        """
+        exact = self.exact(name)
+        people = list(exact)
+        if len(people) < limit:
+            people.extend(
+                person for person in self.prefix(name, limit)
+                if person not in people
+            )
+        if len(people) < limit and not exact:
+            people.extend(
+                person for person in self.fuzzy(name, limit)
+                if person not in people
+            )
+        return people[:limit]
+
+    def _prepare_scores(self):
+        # Most movies of anyone under each key, for ranking prefix matches
+        if self.scores is None:
+            import numpy as np
+            graph = self.graph
+            credits = np.diff(np.asarray(graph.person_offsets, dtype=np.int64))
+            people = np.asarray(graph.name_people, dtype=np.int64)
+            offsets = np.asarray(graph.name_offsets, dtype=np.int64)
+            if len(people) == 0:
+                self.scores = np.zeros(len(offsets) - 1, dtype=np.int64)
+            else:
+                self.scores = np.maximum.reduceat(credits[people], offsets[:-1])
+        return self.scores
+
+    def _prepare_trigrams(self):
+        # Trigram postings over the keys, for gathering fuzzy candidates
+        import numpy as np
+        if self.trigrams is None:
+            self.trigrams = build_trigrams(self.graph.name_keys)
+        return tuple(np.asarray(column) for column in self.trigrams)
+
+    def _ranked(self, people):
+        # Most movies first, then by id for a stable order
+        offsets = self.graph.person_offsets
+        return sorted(
+            people, key=lambda person: (offsets[person] - offsets[person + 1], person)
+        )
+
+
+def trigrams_of(name):
+    padded = f"  {name} "
+    return [padded[i:i + 3] for i in range(len(padded) - 2)]
+
+
+def trigram_codes(trigrams):
+    """
+    Returns an int64 array packing each three-character trigram
+    into one number, 21 bits per character.
+    """
+    import numpy as np
+    points = np.frombuffer("".join(trigrams).encode("utf-32-le"), dtype=np.uint32)
+    points = points.astype(np.int64).reshape(-1, 3)
+    return points[:, 0] << 42 | points[:, 1] << 21 | points[:, 2]
+
+
+def build_trigrams(keys):
+    """
+    Returns the trigram index of `keys` as (codes, offsets, keys) arrays:
+    the sorted distinct trigram codes, and for the trigram codes[t], the
+    indices of the keys containing it at keys[offsets[t]:offsets[t + 1]].
+    """
+    import numpy as np
+    padded = [f"  {key} " for key in keys]
+    count = max(len(padded), 1)
+    lengths = np.fromiter(map(len, padded), dtype=np.int64, count=len(padded))
+    points = np.frombuffer("".join(padded).encode("utf-32-le"), dtype=np.uint32)
+    points = points.astype(np.int64)
+
+    # Trigrams starting at every position but the last two of each key
+    owners = np.repeat(np.arange(len(padded), dtype=np.int64), lengths)
+    ends = np.cumsum(lengths)
+    starts = np.flatnonzero(np.arange(len(points)) + 2 < ends[owners])
+    trigrams = points[starts] << 42 | points[starts + 1] << 21 | points[starts + 2]
+
+    # Number the distinct trigrams, then keep each (trigram, key) pair once,
+    # grouped by trigram (plain sorts are much faster than np.unique here)
+    codes = np.sort(trigrams)
+    codes = codes[_first_of_runs(codes)]
+    pairs = np.sort(np.searchsorted(codes, trigrams) * count + owners[starts])
+    pairs = pairs[_first_of_runs(pairs)]
+    offsets = np.zeros(len(codes) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(pairs // count, minlength=len(codes)), out=offsets[1:])
+    return codes, offsets, (pairs % count).astype(np.int32)
+
+
+def _first_of_runs(values):
+    # Mask of the elements of sorted `values` that differ from the one before
+    import numpy as np
+    mask = np.ones(len(values), dtype=bool)
+    np.not_equal(values[1:], values[:-1], out=mask[1:])
+    return mask
+
+
+def edit_distance(a, b, limit):
+    """
+    Returns the Levenshtein distance between `a` and `b`,
+    or `limit + 1` as soon as it must exceed `limit`.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ca != cb)
+            ))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
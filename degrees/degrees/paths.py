@@ -0,0 +1,210 @@
+import heapq
+from itertools import count
+
+
+def all_shortest_paths(graph, source, target):
+    """
+    Yields every shortest list of (movie, person) index pairs connecting
+    person `source` to person `target`, one at a time.
+
+    A single breadth-first search finds each person's distance from the
+    source; paths are then walked back from the target through the layer
+    DAG, whose predecessor lists are built only for people on some
+    shortest path, and only when first reached.
+    """
+    depth = _layers(graph, source, target)
+    if target not in depth:
+        return
+    if source == target:
+        yield []
+        return
+
+    predecessors = {}
+
+    def steps_into(person):
+        # (movie, person) steps one layer closer to the source
+        steps = predecessors.get(person)
+        if steps is None:
+            wanted = depth[person] - 1
+            steps = []
+            for movie in graph.movies_of(person):
+                for neighbor in graph.stars_of(movie):
+                    if depth.get(neighbor) == wanted:
+                        steps.append((movie, neighbor))
+            predecessors[person] = steps
+        return steps
+
+    # Depth-first over the DAG from the target, with an explicit stack
+    # of step iterators so long paths cannot exhaust the call stack
+    path = []
+    stack = [iter(steps_into(target))]
+    current = [target]
+    while stack:
+        step = next(stack[-1], None)
+        if step is None:
+            stack.pop()
+            current.pop()
+            if path:
+                path.pop()
+            continue
+        movie, previous = step
+        path.append((movie, current[-1]))
+        if previous == source:
+            yield path[::-1]
+            path.pop()
+            continue
+        current.append(previous)
+        stack.append(iter(steps_into(previous)))
+
+
+def _layers(graph, source, target):
+    """
+    Returns the distance from `source` of everyone reached by a
+    breadth-first search that stops after the layer holding `target`.
+    """
+    depth = {source: 0}
+    expanded = set()
+    frontier = [source]
+    while frontier and target not in depth:
+        next_frontier = []
+        for person in frontier:
+            next_depth = depth[person] + 1
+            for movie in graph.movies_of(person):
+                if movie in expanded:
+                    continue
+                expanded.add(movie)
+                for neighbor in graph.stars_of(movie):
+                    if neighbor not in depth:
+                        depth[neighbor] = next_depth
+                        next_frontier.append(neighbor)
+        frontier = next_frontier
+    return depth
+
+
+def k_shortest_paths(graph, source, target, k=None):
+    """
+    Yields up to `k` (or all, if `k` is None) distinct loopless paths of
+    (movie, person) index pairs from `source` to `target`, shortest first.
+
+    Follows Yen's algorithm: each new path branches off a previous one at
+    some "spur" person, found by a breadth-first search that avoids the
+    earlier part of the path and the steps earlier paths took from there.
+    """
+    if k is not None and k <= 0:
+        return
+    first = _restricted_search(graph, source, target, set(), set(), None)
+    if first is None:
+        return
+
+    found = [first]
+    seen = {tuple(first)}
+    candidates = []
+    order = count()
+    yielded = 0
+    while True:
+        path = found[-1]
+        people = [source] + [person for _, person in path]
+
+        # A spur search may return a walk through someone twice; it still
+        # seeds later spurs, but is not itself a loopless path
+        if len(set(people)) == len(people):
+            yield path
+            yielded += 1
+            if k is not None and yielded >= k:
+                return
+
+        for i in range(len(path)):
+            spur, root = people[i], path[:i]
+
+            # Steps out of the spur already taken by paths sharing this root
+            banned_steps = {
+                other[i] for other in found
+                if len(other) > i and other[:i] == root
+            }
+            banned_people = set(people[:i])
+
+            # Leaving by the movie the root arrived by would just be a
+            # detour through another star of that same movie
+            entry_movie = root[-1][0] if root else None
+
+            spur_path = _restricted_search(
+                graph, spur, target, banned_people, banned_steps, entry_movie
+            )
+            if spur_path is None:
+                continue
+            candidate = root + spur_path
+            key = tuple(candidate)
+            if key not in seen:
+                seen.add(key)
+                heapq.heappush(candidates, (len(candidate), next(order), candidate))
+
+        if not candidates:
+            return
+        found.append(heapq.heappop(candidates)[2])
+
+
+def _restricted_search(graph, source, target, banned_people, banned_steps,
+                       entry_movie):
+    """
+    Returns a shortest (movie, person) path from `source` to `target` that
+    never visits `banned_people`, does not start with a step in
+    `banned_steps` or through `entry_movie`, and never takes two steps
+    in a row through the same movie, or None.
+
+    Since the movie a person was reached by decides where they may go
+    next, the search is over (person, movie) states. Each person needs at
+    most two, reached by different movies: whichever movie the next step
+    takes, one of the two is free to take it.
+    """
+    if source == target:
+        return []
+
+    blocked = set(banned_people)
+    blocked.add(source)
+
+    # Movies each person has been reached by, and the state before each
+    entries = {}
+    parent = {}
+
+    # Casts touched by a banned first step are left open for later people.
+    # Other casts are expanded once; after that only the person who first
+    # expanded one can still gain a state from it.
+    reopened = {movie for movie, _ in banned_steps}
+    expanded = {}
+    frontier = [(source, entry_movie)]
+    while frontier:
+        next_frontier = []
+        for state in frontier:
+            person, arrived_by = state
+            for movie in graph.movies_of(person):
+                if movie == arrived_by:
+                    continue
+                if movie in expanded:
+                    stars = (expanded[movie],)
+                else:
+                    stars = graph.stars_of(movie)
+                    if person != source or movie not in reopened:
+                        expanded[movie] = person
+                for neighbor in stars:
+                    reached = entries.get(neighbor, ())
+                    if neighbor in blocked or len(reached) == 2 or movie in reached:
+                        continue
+                    if person == source and (movie, neighbor) in banned_steps:
+                        continue
+                    entries[neighbor] = reached + (movie,)
+                    parent[(neighbor, movie)] = state
+                    if neighbor == target:
+                        return _walk_back(parent, source, (neighbor, movie))
+                    next_frontier.append((neighbor, movie))
+        frontier = next_frontier
+    return None
+
+
+def _walk_back(parent, source, state):
+    path = []
+    while state[0] != source:
+        person, movie = state
+        path.append((movie, person))
+        state = parent[state]
+    path.reverse()
+    return path
@@ -0,0 +1,147 @@
+import asyncio
+import json
+import sys
+from urllib.parse import parse_qs, urlsplit
+
+import degrees
+
+# Largest request head accepted, in bytes
+MAX_REQUEST = 16 * 1024
+
+
+def main():
+    if len(sys.argv) not in [3, 4]:
+        sys.exit("Usage: python server.py directory (port | unix:path) [workers]")
+    directory = sys.argv[1]
+    address = sys.argv[2]
+    workers = int(sys.argv[3]) if len(sys.argv) == 4 else None
+
+    print("Loading data...")
+    degrees.load_data(directory)
+    print("Data loaded.")
+
+    asyncio.run(serve(directory, address, workers))
+
+
+async def serve(directory, address, workers=None):
+    """
+    Answers HTTP requests on `address`, a TCP port on localhost
+    or `unix:path` for a Unix socket, until cancelled.
+
+    Searches run in a process pool so the event loop keeps serving
+    other requests while long searches are in progress.
+    """
+    with degrees.worker_pool(directory, workers) as pool:
+
+        async def handle(reader, writer):
+            await handle_connection(reader, writer, pool)
+
+        if address.startswith("unix:"):
+            server = await asyncio.start_unix_server(handle, address[len("unix:"):])
+        else:
+            server = await asyncio.start_server(handle, "127.0.0.1", int(address))
+        print(f"Serving on {address}.")
+        async with server:
+            await server.serve_forever()
+
+
+async def handle_connection(reader, writer, pool):
+    """
+    Serves one HTTP/1.1 request per connection.
+    """
+    try:
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            return
+        if len(head) > MAX_REQUEST:
+            await respond(writer, 431, {"error": "request too large"})
+            return
+
+        request_line = head.split(b"\r\n", 1)[0].decode("latin-1")
+        try:
+            method, target, _ = request_line.split(" ", 2)
+        except ValueError:
+            await respond(writer, 400, {"error": "bad request"})
+            return
+        if method != "GET":
+            await respond(writer, 405, {"error": "only GET is supported"})
+            return
+
+        url = urlsplit(target)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        route = ROUTES.get(url.path)
+        if route is None:
+            await respond(writer, 404, {"error": "not found"})
+            return
+
+        try:
+            body = await asyncio.get_running_loop().run_in_executor(
+                pool, route, query
+            )
+        except KeyError as e:
+            await respond(writer, 400, {"error": f"missing parameter {e}"})
+            return
+        except ValueError as e:
+            await respond(writer, 400, {"error": str(e)})
+            return
+        await respond(writer, 200, body)
+    finally:
+        writer.close()
+
+
+async def respond(writer, status, body):
+    reasons = {
+        200: "OK", 400: "Bad Request", 404: "Not Found",
+        405: "Method Not Allowed", 431: "Request Header Fields Too Large"
+    }
+    payload = json.dumps(body).encode("utf-8")
+    writer.write(
+        f"HTTP/1.1 {status} {reasons[status]}\r\n"
+        "Content-Type: application/json\r\n"
+        f"Content-Length: {len(payload)}\r\n"
+        "Connection: close\r\n\r\n".encode("latin-1") + payload
+    )
+    await writer.drain()
+
+
+def path_route(query):
+    """
+    GET /path?source=ID&target=ID
+    """
+    source, target = query["source"], query["target"]
+    path = degrees.shortest_path(source, target)
+    return {
+        "source": source,
+        "target": target,
+        "degrees": None if path is None else len(path),
+        "path": path
+    }
+
+
+def lookup_route(query):
+    """
+    GET /lookup?name=NAME[&limit=N]
+    """
+    limit = int(query.get("limit", 10))
+    return {
+        "name": query["name"],
+        "candidates": [
+            {
+                "id": person_id,
+                "name": degrees.people[person_id]["name"],
+                "birth": degrees.people[person_id]["birth"]
+            }
+            for person_id in degrees.candidates_for_name(query["name"], limit)
+        ]
+    }
+
+
+ROUTES = {
+    "/path": path_route,
+    "/lookup": lookup_route
+}
+
+
+if __name__ == "__main__":
+    main()
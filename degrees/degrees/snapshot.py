@@ -0,0 +1,241 @@
+import mmap
+import os
+import struct
+from array import array
+
+from graph import Graph, StringTable, pack_strings
+from nameindex import build_trigrams
+
+SNAPSHOT_NAME = "degrees.snapshot"
+SOURCE_FILES = ("people.csv", "movies.csv", "stars.csv")
+
+MAGIC = b"DEGSNAP\0"
+VERSION = 5
+
+# Header: magic, version, section count, size of the delta log in bytes,
+# then (size, mtime_ns) per source file
+HEADER = struct.Struct("<8sIIq" + "qq" * len(SOURCE_FILES))
+
+# Delta log entry: (size, mtime_ns) per delta file, -1 for missing ones,
+# then the length of the delta directory's path, which follows the entry
+DELTA = struct.Struct("<" + "qq" * len(SOURCE_FILES) + "I")
+
+# Section table entry: kind, typecode, offset, length in bytes
+SECTION = struct.Struct("<4s4sqq")
+
+ARRAY = b"arr\0"
+STRINGS = b"str\0"
+
+# Graph attributes in the order they are stored
+COLUMNS = (
+    ("person_ids", STRINGS),
+    ("movie_ids", STRINGS),
+    ("person_offsets", ARRAY),
+    ("person_movies", ARRAY),
+    ("movie_offsets", ARRAY),
+    ("movie_people", ARRAY),
+    ("person_names", STRINGS),
+    ("person_births", STRINGS),
+    ("movie_titles", STRINGS),
+    ("movie_years", STRINGS),
+    ("name_keys", STRINGS),
+    ("name_offsets", ARRAY),
+    ("name_people", ARRAY),
+    ("sorted_counts", ARRAY),
+)
+
+# Typecodes of the name index's trigram (codes, offsets, keys), stored last
+TRIGRAM_TYPECODES = ("q", "q", "i")
+
+
+def snapshot_path(directory):
+    return os.path.join(directory, SNAPSHOT_NAME)
+
+
+def source_signature(directory, deltas=()):
+    """
+    Returns the (size, mtime_ns) of each source CSV in `directory`, and
+    the path and CSV sizes and times of each delta directory in `deltas`
+    applied on top of them, used to tell whether a snapshot is still up to date.
+    """
+    return (
+        _stat_files(directory),
+        tuple(
+            (os.path.abspath(delta), _stat_files(delta, optional=True))
+            for delta in deltas
+        )
+    )
+
+
+def current_signature(directory):
+    """
+    Returns the signature an up-to-date snapshot of `directory` has: that of
+    its source CSVs with the deltas recorded in its snapshot that still exist.
+    """
+    deltas = [
+        delta for delta in recorded_deltas(snapshot_path(directory))
+        if os.path.isdir(delta)
+    ]
+    return source_signature(directory, deltas)
+
+
+def recorded_deltas(path):
+    """
+    Returns the paths of the delta directories recorded as applied
+    in the snapshot at `path`, in the order they were applied.
+    """
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        return ()
+    with f:
+        header = f.read(HEADER.size)
+        if len(header) < HEADER.size:
+            return ()
+        magic, version, _, log_size, *_ = HEADER.unpack(header)
+        if magic != MAGIC or version != VERSION:
+            return ()
+        log = f.read(log_size)
+    return tuple(delta for delta, _ in unpack_deltas(log))
+
+
+def pack_deltas(deltas):
+    """
+    Returns the delta log for the (path, signature) `deltas` of a signature.
+    """
+    log = bytearray()
+    for delta, signature in deltas:
+        path = delta.encode("utf-8")
+        log += DELTA.pack(*signature, len(path)) + path
+    return bytes(log)
+
+
+def unpack_deltas(log):
+    """
+    Returns the (path, signature) deltas stored in a delta log.
+    """
+    deltas = []
+    position = 0
+    while position + DELTA.size <= len(log):
+        *signature, length = DELTA.unpack_from(log, position)
+        position += DELTA.size
+        path = bytes(log[position:position + length]).decode("utf-8")
+        deltas.append((path, tuple(signature)))
+        position += length
+    return tuple(deltas)
+
+
+def _stat_files(directory, optional=False):
+    # (size, mtime_ns) of each source file, or (-1, -1) if optional and missing
+    signature = []
+    for filename in SOURCE_FILES:
+        try:
+            stat = os.stat(os.path.join(directory, filename))
+        except FileNotFoundError:
+            if not optional:
+                raise
+            signature.extend((-1, -1))
+        else:
+            signature.extend((stat.st_size, stat.st_mtime_ns))
+    return tuple(signature)
+
+
+def write_snapshot(graph, path, signature, trigrams=None):
+    """
+    Writes `graph` to `path` as a single binary file, along with the
+    trigram index of its names (see `nameindex.build_trigrams`), which
+    is built if not given.
+
+    The file is written next to its destination and moved into place,
+    so readers never see a partial snapshot.
+    """
+    sections = []
+    for name, kind in COLUMNS:
+        column = getattr(graph, name)
+        if kind == STRINGS:
+            if not isinstance(column, StringTable):
+                column = pack_strings(column)
+            sections.append((ARRAY, array("q", column.offsets)))
+            sections.append((STRINGS, bytes(column.blob)))
+        else:
+            sections.append((ARRAY, array(column.typecode, column)))
+
+    import numpy as np
+    if trigrams is None:
+        trigrams = build_trigrams(graph.name_keys)
+    for typecode, column in zip(TRIGRAM_TYPECODES, trigrams):
+        sections.append((ARRAY, array(typecode, np.asarray(column, dtype=typecode).tobytes())))
+
+    # Lay sections out after the header, delta log and table, 8-byte aligned
+    files, deltas = signature
+    log = pack_deltas(deltas)
+    position = HEADER.size + len(log) + SECTION.size * len(sections)
+    table = []
+    for kind, data in sections:
+        position = _align(position)
+        length = len(data) * data.itemsize if kind == ARRAY else len(data)
+        typecode = data.typecode.encode() if kind == ARRAY else b"B"
+        table.append(SECTION.pack(kind, typecode, position, length))
+        position += length
+
+    temporary = f"{path}.tmp{os.getpid()}"
+    with open(temporary, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(sections), len(log), *files))
+        f.write(log)
+        f.writelines(table)
+        for kind, data in sections:
+            f.write(b"\0" * (_align(f.tell()) - f.tell()))
+            f.write(data.tobytes() if kind == ARRAY else data)
+    os.replace(temporary, path)
+
+
+def load_snapshot(path, signature):
+    """
+    Memory-maps the snapshot at `path` and returns a Graph backed by it,
+    and the trigram index of its names.
+
+    Returns None if there is no snapshot, or if it was written by another
+    version or from source files that no longer match `signature`.
+    """
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        return None
+    with f:
+        if os.fstat(f.fileno()).st_size < HEADER.size:
+            return None
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    magic, version, count, log_size, *stored = HEADER.unpack_from(buffer)
+    if magic != MAGIC or version != VERSION:
+        buffer.close()
+        return None
+    log = buffer[HEADER.size:HEADER.size + log_size]
+    if (tuple(stored), unpack_deltas(log)) != signature:
+        buffer.close()
+        return None
+
+    view = memoryview(buffer)
+    sections = []
+    for i in range(count):
+        kind, typecode, offset, length = SECTION.unpack_from(
+            buffer, HEADER.size + log_size + i * SECTION.size
+        )
+        data = view[offset:offset + length]
+        if kind == ARRAY:
+            data = data.cast(typecode.rstrip(b"\0").decode())
+        sections.append(data)
+
+    columns = []
+    sections = iter(sections)
+    for name, kind in COLUMNS:
+        if kind == STRINGS:
+            offsets = next(sections)
+            columns.append(StringTable(offsets, next(sections)))
+        else:
+            columns.append(next(sections))
+    return Graph(*columns), tuple(sections)
+
+
+def _align(position):
+    return (position + 7) & ~7
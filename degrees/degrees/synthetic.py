@@ -0,0 +1,151 @@
+import csv
+import os
+import random
+import sys
+from itertools import accumulate
+
+FIRST_NAMES = [
+    "James", "Mary", "John", "Patricia", "Robert", "Jennifer", "Michael",
+    "Linda", "William", "Elizabeth", "David", "Barbara", "Richard", "Susan",
+    "Joseph", "Jessica", "Thomas", "Sarah", "Charles", "Karen", "Emma", "Tom"
+]
+LAST_NAMES = [
+    "Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller",
+    "Davis", "Rodriguez", "Martinez", "Hernandez", "Lopez", "Wilson",
+    "Anderson", "Thomas", "Taylor", "Moore", "Jackson", "Martin", "Lee",
+    "Hanks", "Bacon", "Watson", "Cruise"
+]
+SYLLABLES = [
+    "al", "an", "ber", "bel", "cal", "cor", "da", "dor", "el", "ev", "fin",
+    "ford", "gar", "ham", "hol", "is", "jen", "kel", "ley", "lor", "mar",
+    "mond", "nel", "or", "pe", "quin", "ric", "ridge", "ros", "sal", "son",
+    "ter", "ton", "ul", "van", "wen", "well", "wood", "yor", "zel"
+]
+WORDS = [
+    "Night", "Return", "Last", "City", "Love", "Dark", "Star", "River",
+    "Secret", "Lost", "King", "Road", "Summer", "Shadow", "Dream", "War",
+    "Heart", "Storm", "Game", "Silent", "Golden", "Wild", "Blue", "House"
+]
+
+# Cast sizes follow a Pareto tail: most films have a handful of
+# credited stars, a few have hundreds
+CAST_SHAPE = 1.6
+MIN_CAST = 2
+MAX_CAST = 500
+
+# Popularity of people also follows a Pareto tail, so a small group
+# of prolific actors appears in many films
+POPULARITY_SHAPE = 1.2
+
+# First and last names are drawn from pools of real names followed by
+# made-up ones, with Zipf-distributed frequencies: a few names are very
+# common, but most full names are shared by nobody else. The last name
+# pool grows with the number of people.
+FIRST_NAME_POOL = 5000
+PEOPLE_PER_LAST_NAME = 4
+NAME_EXPONENT = 0.7
+
+
+def main():
+    if len(sys.argv) not in [3, 4]:
+        sys.exit("Usage: python synthetic.py directory edges [seed]")
+    directory = sys.argv[1]
+    edges = int(sys.argv[2])
+    seed = int(sys.argv[3]) if len(sys.argv) == 4 else 0
+
+    counts = generate(directory, edges, seed)
+    print("Wrote {} people, {} movies and {} stars to {}.".format(*counts, directory))
+
+
+def generate(directory, edges, seed=0):
+    """
+    Writes people.csv, movies.csv and stars.csv with exactly `edges` star
+    rows to `directory`, and returns (people, movies, stars) written.
+
+    The same `edges` and `seed` always produce the same files.
+    """
+    rng = random.Random(seed)
+    os.makedirs(directory, exist_ok=True)
+
+    # People average about 3 credits
+    num_people = max(MIN_CAST, edges // 3)
+
+    # Cumulative popularity weights, used to pick cast members
+    weights = []
+    total = 0.0
+    for _ in range(num_people):
+        total += rng.paretovariate(POPULARITY_SHAPE)
+        weights.append(total)
+
+    first_names = name_pool(rng, FIRST_NAMES, FIRST_NAME_POOL)
+    last_names = name_pool(rng, LAST_NAMES, num_people // PEOPLE_PER_LAST_NAME)
+    first_weights = zipf_weights(len(first_names))
+    last_weights = zipf_weights(len(last_names))
+
+    with open(os.path.join(directory, "people.csv"), "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "name", "birth"])
+        for person in range(num_people):
+            first = rng.choices(first_names, cum_weights=first_weights)[0]
+            last = rng.choices(last_names, cum_weights=last_weights)[0]
+            name = f"{first} {last}"
+            birth = "" if rng.random() < 0.3 else str(rng.randint(1890, 2010))
+            writer.writerow([person_id(person), name, birth])
+
+    # Movies are added until exactly `edges` credits are written, since
+    # cast sizes vary too much to know beforehand how many are needed
+    num_movies = 0
+    written = 0
+    with open(os.path.join(directory, "movies.csv"), "w", encoding="utf-8", newline="") as movies, \
+            open(os.path.join(directory, "stars.csv"), "w", encoding="utf-8", newline="") as stars:
+        movie_writer = csv.writer(movies)
+        movie_writer.writerow(["id", "title", "year"])
+        star_writer = csv.writer(stars)
+        star_writer.writerow(["person_id", "movie_id"])
+        while written < edges:
+            movie = num_movies
+            num_movies += 1
+            title = " ".join(rng.sample(WORDS, rng.randint(1, 3)))
+            movie_writer.writerow([movie_id(movie), title, rng.randint(1900, 2025)])
+
+            size = min(MAX_CAST, int(MIN_CAST * rng.paretovariate(CAST_SHAPE)), edges - written)
+            cast = set(rng.choices(range(num_people), cum_weights=weights, k=size))
+            star_writer.writerows((person_id(person), movie_id(movie)) for person in cast)
+            written += len(cast)
+
+    return num_people, num_movies, written
+
+
+def name_pool(rng, common, size):
+    """
+    Returns the `common` names followed by made-up ones built from
+    SYLLABLES, at least `size` distinct names in all.
+    """
+    pool = list(common)
+    seen = set(pool)
+    while len(pool) < size:
+        name = "".join(rng.choices(SYLLABLES, k=rng.randint(2, 4))).capitalize()
+        if name not in seen:
+            seen.add(name)
+            pool.append(name)
+    return pool
+
+
+def zipf_weights(size, exponent=NAME_EXPONENT):
+    """
+    Returns cumulative weights making the item of rank r about
+    r ** -`exponent` times as likely as the first.
+    """
+    return list(accumulate(rank ** -exponent for rank in range(1, size + 1)))
+
+
+def person_id(person):
+    return str(100 + person)
+
+
+def movie_id(movie):
+    return str(10000 + movie)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,38 +1,21 @@
-class Node():
-    def __init__(self, state, parent, action):
-        self.state = state
-        self.parent = parent
-        self.action = action
-
-
-class StackFrontier():
-    def __init__(self):
-        self.frontier = []
-
-    def add(self, node):
-        self.frontier.append(node)
-
-    def contains_state(self, state):
-        return any(node.state == state for node in self.frontier)
-
-    def empty(self):
-        return len(self.frontier) == 0
-
-    def remove(self):
-        if self.empty():
-            raise Exception("empty frontier")
-        else:
-            node = self.frontier[-1]
-            self.frontier = self.frontier[:-1]
-            return node
-
-
-class QueueFrontier(StackFrontier):
-
-    def remove(self):
-        if self.empty():
-            raise Exception("empty frontier")
-        else:
-            node = self.frontier[0]
-            self.frontier = self.frontier[1:]
-            return node
+import os
+import sys
+
+# The search core lives in common/ and is shared with the other projects;
+# its module name is specific to this repository so nothing else on the
+# path can shadow it.
+#
+# degrees.py itself does not search with these drivers: its searches in
+# graph.py and paths.py expand whole breadth-first layers over the CSR
+# arrays, from both ends at once, which a node-at-a-time frontier cannot
+# do. They are kept here for the course's Node-based API and share the
+# same SearchStats.
+sys.path.append(os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), os.pardir, os.pardir, "common"
+))
+
+from cs50search import (
+    BucketFrontier, Node, PriorityFrontier, QueueFrontier, SearchStats,
+    StackFrontier, astar_search, breadth_first_search, depth_first_search,
+    greedy_best_first_search, uniform_cost_search
+)
@@ -0,0 +1,90 @@
+import glob
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+from maze import STRATEGIES, Maze
+
+
+def main():
+    args = sys.argv[1:]
+
+    # --strategy=NAME picks the search, --grid the NumPy grid backend, and
+    # --images=DIR draws each solved maze to DIR/<name>.png
+    options = {"strategy": "dfs", "backend": "nodes", "images": None}
+    for arg in list(args):
+        if arg.startswith("--strategy="):
+            options["strategy"] = arg[len("--strategy="):]
+        elif arg == "--grid":
+            options["backend"] = "grid"
+        elif arg.startswith("--images="):
+            options["images"] = arg[len("--images="):]
+        else:
+            continue
+        args.remove(arg)
+    if len(args) != 1 or options["strategy"] not in STRATEGIES:
+        sys.exit(
+            f"Usage: python batch.py [--strategy={'|'.join(STRATEGIES)}] "
+            "[--grid] [--images=DIR] (directory | pattern)"
+        )
+
+    filenames = find_mazes(args[0])
+    if not filenames:
+        sys.exit(f"No mazes found in {args[0]}")
+    if options["images"] is not None:
+        os.makedirs(options["images"], exist_ok=True)
+
+    for record in solve_mazes(filenames, **options):
+        print(json.dumps(record), flush=True)
+
+
+def find_mazes(location):
+    """
+    Returns the maze files in directory `location`, or matching the
+    glob pattern `location`, in sorted order.
+    """
+    if os.path.isdir(location):
+        location = os.path.join(location, "*.txt")
+    return sorted(path for path in glob.glob(location) if os.path.isfile(path))
+
+
+def solve_mazes(filenames, strategy="dfs", backend="nodes", images=None, workers=None):
+    """
+    Solves every maze on a process pool and yields one result record
+    per maze, in the order they finish.
+    """
+    jobs = [(filename, strategy, backend, images) for filename in filenames]
+    with multiprocessing.Pool(workers) as pool:
+        yield from pool.imap_unordered(solve_maze, jobs)
+
+
+def solve_maze(job):
+    """
+    Solves one maze and returns a record of its path length, the states
+    it explored and how long solving took. Mazes that cannot be read or
+    solved are recorded with an error instead.
+    """
+    filename, strategy, backend, images = job
+    record = {"maze": filename, "strategy": strategy}
+    try:
+        m = Maze(filename, backend)
+        start = time.perf_counter()
+        m.solve(strategy)
+        record["seconds"] = time.perf_counter() - start
+    except Exception as e:
+        record["error"] = str(e)
+        return record
+
+    record["length"] = len(m.solution[0])
+    record["explored"] = m.num_explored
+    if images is not None:
+        name = os.path.splitext(os.path.basename(filename))[0]
+        record["image"] = os.path.join(images, f"{name}.png")
+        m.output_image(record["image"], show_explored=True)
+    return record
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,573 @@
+import heapq
+import mmap
+import os
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+# Moves out of a cell, by direction number
+ACTIONS = ("up", "down", "left", "right")
+
+# Parent directions of the start and of cells not yet reached
+START = len(ACTIONS)
+UNVISITED = 255
+
+# Cells a jump point search run checks one by one before scanning ahead
+SHORT_RUN = 8
+
+# Bytes of distance fields kept per grid, least recently used dropped
+# first; each field takes four bytes per cell, and the latest is always kept
+FIELD_BUDGET = 256 * 1024 * 1024
+
+# Search strategies `Grid.solve` accepts
+STRATEGIES = ("dfs", "bfs", "greedy", "astar", "jps", "hpa")
+
+
+def read_maze(filename):
+    """
+    Reads a maze file into a 2-D NumPy array of walls, one byte per cell,
+    and returns (walls, start, goal).
+
+    The file is memory-mapped rather than read into a string, and each line
+    is converted straight into its row of the array, checking for exactly
+    one start (A) and goal (B) along the way. Lines shorter than the widest
+    are padded with open cells, as in Maze.
+    """
+    with open(filename, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            raise Exception("maze must have exactly one start point")
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    with buffer:
+
+        # Find where each line starts and ends, without its line break
+        lines = []
+        position = 0
+        while position < len(buffer):
+            end = buffer.find(b"\n", position)
+            if end == -1:
+                end = len(buffer)
+            stop = end - 1 if end > position and buffer[end - 1] == ord("\r") else end
+            lines.append((position, stop))
+            position = end + 1
+
+        width = max(stop - start for start, stop in lines)
+        walls = np.zeros((len(lines), width), dtype=bool)
+        starts = []
+        goals = []
+        widest = 0
+        for i, (start, stop) in enumerate(lines):
+            row = np.frombuffer(buffer, dtype=np.uint8, count=stop - start, offset=start)
+
+            # Lines with other than ASCII characters are decoded, so each
+            # character is one cell however many bytes it takes
+            if row.size and row.max() >= 0x80:
+                text = buffer[start:stop].decode("utf-8")
+                row = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32)
+            widest = max(widest, row.size)
+
+            walls[i, :row.size] = (row != ord(" ")) & (row != ord("A")) & (row != ord("B"))
+            if len(starts) < 2:
+                starts.extend((i, int(j)) for j in np.flatnonzero(row == ord("A"))[:2])
+            if len(goals) < 2:
+                goals.extend((i, int(j)) for j in np.flatnonzero(row == ord("B"))[:2])
+
+            # Release the mapped row before the buffer is closed
+            del row
+
+    # Validate start and goal
+    if len(starts) != 1:
+        raise Exception("maze must have exactly one start point")
+    if len(goals) != 1:
+        raise Exception("maze must have exactly one goal")
+
+    if widest < width:
+        walls = walls[:, :widest].copy()
+    return walls, starts[0], goals[0]
+
+
+class Grid():
+    """
+    Maze walls held in one flat NumPy array, for mazes too large for
+    a list of lists of bools and a set of (row, col) tuples.
+
+    Cells are numbered row by row in a copy of the maze surrounded by a
+    border of walls, so moving in any direction is adding a fixed offset
+    and never leaves the array. Each open cell has a 4-bit mask of the
+    directions it can move in, computed once up front.
+    """
+
+    def __init__(self, walls, start, goal):
+        walls = np.asarray(walls, dtype=bool)
+        self.height, self.width = walls.shape
+        self.start = start
+        self.goal = goal
+
+        # Open cells, with a one-cell wall border all round
+        self.stride = self.width + 2
+        self.open = np.zeros((self.height + 2) * self.stride, dtype=bool)
+        self.open.reshape(self.height + 2, self.stride)[1:-1, 1:-1] = ~walls
+
+        # Offset of each direction, and the open directions out of each cell
+        self.offsets = (-self.stride, self.stride, -1, 1)
+        self.masks = np.zeros(self.open.size, dtype=np.uint8)
+        for direction, offset in enumerate(self.offsets):
+            reachable = np.zeros_like(self.open)
+            if offset > 0:
+                reachable[:-offset] = self.open[offset:]
+            else:
+                reachable[-offset:] = self.open[:offset]
+            self.masks |= reachable.view(np.uint8) << direction
+        self.masks[~self.open] = 0
+
+        # The (direction, offset) moves allowed by each mask
+        self.moves = [
+            tuple(
+                (direction, offset)
+                for direction, offset in enumerate(self.offsets)
+                if mask >> direction & 1
+            )
+            for mask in range(1 << len(self.offsets))
+        ]
+
+        # Where jump point search runs stop, computed when first needed
+        self.stops = None
+
+        # Recently used distance fields, by the goals they lead to
+        self.fields = OrderedDict()
+
+        # Cluster abstraction for hierarchical search, built when first needed
+        self.abstraction = None
+
+        self.parents = None
+        self.num_explored = 0
+
+    def index(self, cell):
+        return (cell[0] + 1) * self.stride + cell[1] + 1
+
+    def cell(self, index):
+        row, col = divmod(index, self.stride)
+        return (row - 1, col - 1)
+
+    def solve(self, strategy="bfs", stats=None):
+        """
+        Returns the (actions, cells) from the start to the goal, using one
+        of STRATEGIES, and records the search in `stats` if given.
+
+        Which direction each reached cell was entered by is kept in
+        `parents`, one byte per cell, in place of Node objects. Jump point
+        search ("jps") only marks the cells it expands, and returns its
+        path with the straight runs between them filled back in.
+        Hierarchical search ("hpa") only marks the cells of its path.
+        """
+        if strategy not in STRATEGIES:
+            raise Exception(f"strategy must be one of {', '.join(STRATEGIES)}")
+
+        self.parents = np.full(self.open.size, UNVISITED, dtype=np.uint8)
+        start, goal = self.index(self.start), self.index(self.goal)
+        if not self.open[start] or not self.open[goal]:
+            raise Exception("no solution")
+
+        if stats is not None:
+            stats.start()
+        try:
+            if strategy == "bfs":
+                self.num_explored = self._layered_search(start, goal, stats)
+            elif strategy == "jps":
+                self.num_explored, jumps = self._jump_point_search(start, goal, stats)
+            elif strategy == "hpa":
+                if self.abstraction is None:
+                    from hpa import build_abstraction
+                    self.abstraction = build_abstraction(self)
+                self.num_explored, path = self.abstraction.search(self, start, goal, stats)
+                if path is not None:
+                    self._follow(path)
+            else:
+                self.num_explored = self._ordered_search(start, goal, strategy, stats)
+        finally:
+            if stats is not None:
+                stats.stop()
+
+        if self.parents[goal] == UNVISITED:
+            raise Exception("no solution")
+        if strategy == "jps":
+            return self._fill_jumps(jumps)
+        return self.path_to(goal)
+
+    def path_to(self, index):
+        """
+        Returns the (actions, cells) that lead from the start to flat
+        cell `index`, following `parents` back.
+        """
+        parents = memoryview(self.parents)
+        actions = []
+        cells = []
+        while parents[index] != START:
+            direction = parents[index]
+            actions.append(ACTIONS[direction])
+            cells.append(self.cell(index))
+            index -= self.offsets[direction]
+        actions.reverse()
+        cells.reverse()
+        return actions, cells
+
+    def explored_cells(self):
+        """
+        Yields the (row, col) of every cell the last search reached.
+        """
+        for index in np.flatnonzero(self.parents != UNVISITED):
+            yield self.cell(int(index))
+
+    def explored_mask(self):
+        """
+        Returns a 2-D bool array marking every cell the last search reached.
+        """
+        reached = self.parents != UNVISITED
+        return reached.reshape(self.height + 2, self.stride)[1:-1, 1:-1]
+
+    def distance_field(self, goals=None):
+        """
+        Returns each cell's distance, in steps, from the nearest of `goals`
+        (the goal, if not given), as a flat array over the bordered grid
+        with -1 for cells no goal can reach.
+
+        The field is found by a breadth-first search out from all the goals
+        at once, a whole layer at a time with array operations, and kept for
+        later calls with the same goals. Only as many of the most recently
+        used fields as fit in FIELD_BUDGET bytes, and at least one, are kept.
+        """
+        key = self._goal_key(goals)
+        field = self.fields.get(key)
+        if field is not None:
+            self.fields.move_to_end(key)
+            return field
+
+        field = np.full(self.open.size, -1, dtype=np.int32)
+        frontier = np.array([index for index in key if self.open[index]], dtype=np.int64)
+        field[frontier] = 0
+        distance = 0
+        while frontier.size:
+            distance += 1
+            frontier_masks = self.masks[frontier]
+            layer = []
+            for direction, offset in enumerate(self.offsets):
+                reached = frontier[(frontier_masks >> direction) & 1 == 1] + offset
+                reached = reached[field[reached] < 0]
+                field[reached] = distance
+                layer.append(reached)
+            frontier = np.concatenate(layer)
+
+        self.fields[key] = field
+        while len(self.fields) > max(1, FIELD_BUDGET // field.nbytes):
+            self.fields.popitem(last=False)
+        return field
+
+    def path_from(self, start, goals=None):
+        """
+        Returns the (actions, cells) of a shortest path from cell `start` to
+        the nearest of `goals` (the goal, if not given).
+
+        Once the goals' distance field is known, this takes time in
+        proportion to the length of the path: each step just moves to a
+        neighboring cell one closer to a goal. Fields for the most recently
+        used sets of goals are kept, up to FIELD_BUDGET bytes; others are
+        recomputed.
+        """
+        field = memoryview(self.distance_field(goals))
+        masks = memoryview(self.masks)
+        row, col = start
+        if not (0 <= row < self.height and 0 <= col < self.width):
+            raise Exception(f"start {start} is outside the maze")
+        index = self.index(start)
+        if field[index] < 0:
+            raise Exception("no solution")
+
+        actions = []
+        cells = []
+        while field[index]:
+            closer = field[index] - 1
+            for direction, offset in self.moves[masks[index]]:
+                if field[index + offset] == closer:
+                    break
+            index += offset
+            actions.append(ACTIONS[direction])
+            cells.append(self.cell(index))
+        return actions, cells
+
+    def _goal_key(self, goals):
+        # The flat indices of `goals`, sorted, to look up distance fields by
+        if goals is None:
+            goals = [self.goal]
+        for row, col in goals:
+            if not (0 <= row < self.height and 0 <= col < self.width):
+                raise Exception(f"goal {(row, col)} is outside the maze")
+        return tuple(sorted({self.index(goal) for goal in goals}))
+
+    def _layered_search(self, start, goal, stats):
+        # Breadth-first search, expanding a whole layer at a time with
+        # array operations. Returns the number of cells expanded.
+        parents = self.parents
+        masks = self.masks
+        parents[start] = START
+        frontier = np.array([start], dtype=np.int64)
+        expanded = 0
+        while frontier.size and parents[goal] == UNVISITED:
+            if stats is not None:
+                layer_started = time.perf_counter()
+            expanded += frontier.size
+            frontier_masks = masks[frontier]
+            layer = []
+            for direction, offset in enumerate(self.offsets):
+                reached = frontier[(frontier_masks >> direction) & 1 == 1] + offset
+                reached = reached[parents[reached] == UNVISITED]
+                parents[reached] = direction
+                layer.append(reached)
+            if stats is not None:
+                stats.layer(
+                    frontier.size, frontier.size, time.perf_counter() - layer_started
+                )
+            frontier = np.concatenate(layer)
+
+        # The goal is counted as explored, as in Maze.solve
+        return expanded + 1 if parents[goal] != UNVISITED else expanded
+
+    def _ordered_search(self, start, goal, strategy, stats):
+        # Depth-first, greedy or A* search, one cell at a time. A cell's
+        # parent is fixed when it is expanded, so frontier entries carry
+        # the direction they would enter it by. Returns the number of
+        # cells expanded.
+        parents = memoryview(self.parents)
+        masks = memoryview(self.masks)
+        moves = self.moves
+        goal_row, goal_col = divmod(goal, self.stride)
+        stride = self.stride
+
+        def distance(index):
+            row, col = divmod(index, stride)
+            return abs(row - goal_row) + abs(col - goal_col)
+
+        expanded = 0
+        if strategy == "dfs":
+            stack = [(start, START)]
+            while stack:
+                index, direction = stack.pop()
+                if parents[index] != UNVISITED:
+                    continue
+                if stats is not None:
+                    stats.expanding(len(stack) + 1)
+                parents[index] = direction
+                expanded += 1
+                if index == goal:
+                    break
+                for direction, offset in moves[masks[index]]:
+                    if parents[index + offset] == UNVISITED:
+                        stack.append((index + offset, direction))
+            return expanded
+
+        # Heap entries are (priority, tie-break, cost, cell, direction);
+        # A* prefers, among equal f = g + h, the cell nearer the goal
+        heap = [(distance(start), distance(start), 0, start, START)]
+        while heap:
+            _, _, cost, index, direction = heapq.heappop(heap)
+            if parents[index] != UNVISITED:
+                continue
+            if stats is not None:
+                stats.expanding(len(heap) + 1)
+            parents[index] = direction
+            expanded += 1
+            if index == goal:
+                break
+            cost += 1
+            for direction, offset in moves[masks[index]]:
+                neighbor = index + offset
+                if parents[neighbor] == UNVISITED:
+                    h = distance(neighbor)
+                    priority = cost + h if strategy == "astar" else h
+                    heapq.heappush(heap, (priority, h, cost, neighbor, direction))
+        return expanded
+
+    def _jump_point_search(self, start, goal, stats):
+        # A* over jump points: from each expanded cell, run straight on in
+        # each allowed direction until reaching a cell where the shortest
+        # paths could turn. Returns the number of cells expanded and the
+        # jump points from start to goal.
+        if self.stops is None:
+            self.stops = self._jump_stops()
+        stops = self.stops
+        stop_bits = memoryview(stops)
+        open_cells = self.open
+        open_bits = memoryview(self.open)
+        parents = memoryview(self.parents)
+        offsets = self.offsets
+        goal_row, goal_col = divmod(goal, self.stride)
+        stride = self.stride
+
+        def distance(index):
+            row, col = divmod(index, stride)
+            return abs(row - goal_row) + abs(col - goal_col)
+
+        def run(index, direction):
+            # Moves from `index` in `direction` to the next jump point,
+            # or returns None on hitting a wall
+            row, col = divmod(index, stride)
+            offset = offsets[direction]
+            bit = 1 << direction
+
+            # Runs in cluttered mazes are mostly short, so look a few
+            # cells ahead before scanning the rest of the line in NumPy
+            jump = index + offset
+            for _ in range(SHORT_RUN):
+                if stop_bits[jump] & bit:
+                    break
+                jump += offset
+            else:
+                if direction == 0:
+                    line = stops[jump::-stride]
+                elif direction == 1:
+                    line = stops[jump::stride]
+                elif direction == 2:
+                    line = stops[jump:index - col - 1:-1]
+                else:
+                    line = stops[jump:index - col + stride]
+
+                # The border guarantees a stop in every direction
+                jump += int(np.argmax(line & bit)) * offset
+            steps = (jump - index) // offset
+
+            # The goal, if passed on the way, is a jump point
+            if direction >= 2:
+                ahead = (goal - index) * offset
+                if row == goal_row and 0 < ahead <= steps:
+                    return goal
+            else:
+                ahead = (goal_row - row) * (1 if offset > 0 else -1)
+                if 0 < ahead <= steps:
+                    if col == goal_col:
+                        return goal
+
+                    # So is where the run crosses a clear line to the goal
+                    crossing = index + ahead * offset
+                    low, high = sorted((crossing, goal))
+                    if ahead < steps and open_cells[low:high + 1].all():
+                        return crossing
+
+            return jump if open_bits[jump] else None
+
+        # Directions worth trying after arriving in each direction: the
+        # same one, and both turns
+        turns = {
+            START: (0, 1, 2, 3),
+            0: (0, 2, 3),
+            1: (1, 2, 3),
+            2: (2, 0, 1),
+            3: (3, 0, 1)
+        }
+
+        came_from = {}
+        expanded = 0
+        heap = [(distance(start), distance(start), 0, start, START, None)]
+        while heap:
+            _, _, cost, index, direction, previous = heapq.heappop(heap)
+            if parents[index] != UNVISITED:
+                continue
+            if stats is not None:
+                stats.expanding(len(heap) + 1)
+            parents[index] = direction
+            came_from[index] = previous
+            expanded += 1
+            if index == goal:
+                jumps = []
+                while index is not None:
+                    jumps.append(index)
+                    index = came_from[index]
+                jumps.reverse()
+                return expanded, jumps
+
+            for direction in turns[direction]:
+                jump = run(index, direction)
+                if jump is not None and parents[jump] == UNVISITED:
+                    step = cost + abs(jump - index) // abs(offsets[direction])
+                    h = distance(jump)
+                    heapq.heappush(heap, (step + h, h, step, jump, direction, index))
+        return expanded, None
+
+    def _follow(self, path):
+        # Marks the parents of the cells along `path`, a list of flat
+        # indices each next to the last
+        directions = {offset: direction for direction, offset in enumerate(self.offsets)}
+        self.parents[path[0]] = START
+        for previous, index in zip(path, path[1:]):
+            self.parents[index] = directions[index - previous]
+
+    def _fill_jumps(self, jumps):
+        # Expands a list of jump points, each in a straight line from the
+        # last, into the (actions, cells) of every step between them
+        actions = []
+        cells = []
+        for previous, index in zip(jumps, jumps[1:]):
+            direction = self.parents[index]
+            offset = self.offsets[direction]
+            for _ in range((index - previous) // offset):
+                previous += offset
+                actions.append(ACTIONS[direction])
+                cells.append(self.cell(previous))
+        return actions, cells
+
+    def _jump_stops(self, block=1024):
+        # Returns, for every cell, a bit per direction saying whether a
+        # jump point search run moving that way stops there: at walls,
+        # where a side cell opens up that was walled off one step back,
+        # and, moving vertically, wherever a horizontal run would stop at
+        # such a cell. Worked out a block of rows at a time, to bound the
+        # size of temporary arrays.
+        height = self.height + 2
+        grid = self.open.reshape(height, self.stride)
+        stops = np.zeros((height, self.stride), dtype=np.uint8)
+        stops[0] = stops[-1] = 0b1111
+        columns = np.arange(self.stride)
+
+        def left_of(cells):
+            # Each cell's left-hand neighbor, walls beyond the edge
+            shifted = np.zeros_like(cells)
+            shifted[:, 1:] = cells[:, :-1]
+            return shifted
+
+        def right_of(cells):
+            shifted = np.zeros_like(cells)
+            shifted[:, :-1] = cells[:, 1:]
+            return shifted
+
+        for first in range(1, height - 1, block):
+            last = min(first + block, height - 1)
+            cells = grid[first:last]
+            above = grid[first - 1:last - 1]
+            below = grid[first + 1:last + 1]
+            left, right = left_of(cells), right_of(cells)
+
+            up = cells & (left & ~left_of(below) | right & ~right_of(below))
+            down = cells & (left & ~left_of(above) | right & ~right_of(above))
+            leftward = cells & (above & ~right_of(above) | below & ~right_of(below))
+            rightward = cells & (above & ~left_of(above) | below & ~left_of(below))
+            up |= ~cells
+            down |= ~cells
+            leftward |= ~cells
+            rightward |= ~cells
+
+            # Columns of the next rightward and leftward stops strictly
+            # past each cell; stops that are not walls are jump points
+            nearest = np.where(rightward, columns, self.stride - 1)
+            nearest = np.minimum.accumulate(nearest[:, ::-1], axis=1)[:, ::-1]
+            nearest = right_of(nearest)
+            turns = np.take_along_axis(cells, nearest, axis=1)
+            nearest = np.where(leftward, columns, 0)
+            nearest = left_of(np.maximum.accumulate(nearest, axis=1))
+            turns |= np.take_along_axis(cells, nearest, axis=1)
+            up |= turns
+            down |= turns
+
+            stops[first:last] = (
+                up.view(np.uint8) | down.view(np.uint8) << 1
+                | leftward.view(np.uint8) << 2 | rightward.view(np.uint8) << 3
+            )
+        return stops.reshape(-1)
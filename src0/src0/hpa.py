@@ -0,0 +1,423 @@
+import hashlib
+import heapq
+import os
+from collections import deque
+
+import numpy as np
+
+# Side of each square cluster of cells
+CLUSTER_SIZE = 32
+
+# Entrances at least this wide get a transition at each end; narrower
+# ones get a single transition in the middle
+WIDE_ENTRANCE = 6
+
+# Roughly how many bytes of search state a batch of clusters may use
+# while their internal distances are being found
+BATCH_BYTES = 64 * 1024 * 1024
+
+
+class Abstraction():
+    """
+    Abstract graph over a Grid, for hierarchical pathfinding (HPA*).
+
+    The maze is divided into square clusters. Wherever open cells face
+    each other across a cluster border, a pair of transition cells is
+    picked; these are the graph's nodes, ordered by cluster, with
+    `cluster_offsets` giving each cluster's range of nodes. Edges join
+    the two cells of each transition pair, at cost 1, and every two
+    nodes of a cluster that are connected within it, at the length of the
+    shortest path between them inside the cluster. Edges are stored in
+    compressed rows: node `u`'s edges are `edge_targets` and `edge_costs`
+    from `edge_offsets[u]` to `edge_offsets[u + 1]`.
+
+    `signature` identifies the walls the abstraction was built for.
+    """
+
+    def __init__(self, cluster_size, signature, nodes, cluster_offsets,
+                 edge_offsets, edge_targets, edge_costs):
+        self.cluster_size = cluster_size
+        self.signature = signature
+        self.nodes = nodes
+        self.cluster_offsets = cluster_offsets
+        self.edge_offsets = edge_offsets
+        self.edge_targets = edge_targets
+        self.edge_costs = edge_costs
+
+    def save(self, filename):
+        """
+        Writes the abstraction to `filename` as a NumPy .npz archive. The
+        file is written next to its destination and moved into place.
+        """
+        temporary = f"{filename}.tmp{os.getpid()}"
+        with open(temporary, "wb") as f:
+            np.savez(
+                f,
+                cluster_size=self.cluster_size,
+                signature=np.frombuffer(self.signature, dtype=np.uint8),
+                nodes=self.nodes,
+                cluster_offsets=self.cluster_offsets,
+                edge_offsets=self.edge_offsets,
+                edge_targets=self.edge_targets,
+                edge_costs=self.edge_costs
+            )
+        os.replace(temporary, filename)
+
+    def search(self, grid, start, goal, stats=None):
+        """
+        Returns the number of nodes and cells expanded and a path of flat
+        cell indices from flat cell `start` to `goal` on `grid`, or None.
+
+        The start and goal are linked to the transitions of their own
+        clusters, a path is found over the abstract graph with A*, and
+        each abstract edge on it is then refined into cells by a search
+        of just the one cluster it crosses. Paths are close to, but not
+        always exactly, the shortest.
+        """
+        if start == goal:
+            return 1, [start]
+
+        nodes = memoryview(self.nodes)
+        edge_offsets = memoryview(self.edge_offsets)
+        edge_targets = memoryview(self.edge_targets)
+        edge_costs = memoryview(self.edge_costs)
+        goal_row, goal_col = divmod(goal, grid.stride)
+        stride = grid.stride
+
+        def distance(index):
+            row, col = divmod(index, stride)
+            return abs(row - goal_row) + abs(col - goal_col)
+
+        # Link the start and goal, as extra nodes, into the graph
+        start_node, goal_node = len(self.nodes), len(self.nodes) + 1
+        positions = {start_node: start, goal_node: goal}
+        start_distances = _cluster_distances(grid, self.cluster_size, start)
+        goal_distances = _cluster_distances(grid, self.cluster_size, goal)
+        start_links = self._links(grid, start, start_distances)
+        goal_links = self._links(grid, goal, goal_distances)
+        if goal in start_distances:
+            start_links.append((goal_node, start_distances[goal]))
+        goal_costs = dict(goal_links)
+        expanded = len(start_distances) + len(goal_distances)
+
+        # A* over the abstract graph
+        came_from = {}
+        heap = [(distance(start), distance(start), 0, start_node, None)]
+        while heap:
+            _, _, cost, node, previous = heapq.heappop(heap)
+            if node in came_from:
+                continue
+            if stats is not None:
+                stats.expanding(len(heap) + 1)
+            came_from[node] = previous
+            expanded += 1
+            if node == goal_node:
+                break
+
+            if node == start_node:
+                links = start_links
+            else:
+                links = [
+                    (edge_targets[i], edge_costs[i])
+                    for i in range(edge_offsets[node], edge_offsets[node + 1])
+                ]
+                if node in goal_costs:
+                    links.append((goal_node, goal_costs[node]))
+            for neighbor, step in links:
+                if neighbor not in came_from:
+                    position = positions.get(neighbor)
+                    if position is None:
+                        position = nodes[neighbor]
+                    h = distance(position)
+                    heapq.heappush(heap, (cost + step + h, h, cost + step, neighbor, node))
+        else:
+            return expanded, None
+
+        # Walk back to the start, then refine each abstract edge into cells
+        route = []
+        node = goal_node
+        while node is not None:
+            route.append(positions[node] if node in positions else nodes[node])
+            node = came_from[node]
+        route.reverse()
+
+        path = [start]
+        for previous, index in zip(route, route[1:]):
+            if index - previous in grid.offsets:
+                path.append(index)
+            else:
+                cells, count = _cluster_path(grid, self.cluster_size, previous, index)
+                path.extend(cells)
+                expanded += count
+        return expanded, _without_loops(path)
+
+    def _links(self, grid, index, distances):
+        # (node, distance) for each transition in the cluster of flat cell
+        # `index` that can be reached within the cluster
+        row, col = grid.cell(index)
+        columns = -(-grid.width // self.cluster_size)
+        cluster = row // self.cluster_size * columns + col // self.cluster_size
+        links = []
+        for node in range(self.cluster_offsets[cluster], self.cluster_offsets[cluster + 1]):
+            position = int(self.nodes[node])
+            if position in distances:
+                links.append((node, distances[position]))
+        return links
+
+
+def signature(grid):
+    """
+    Returns a digest of `grid`'s walls and shape, to tell whether an
+    abstraction was built for it.
+    """
+    digest = hashlib.sha1(f"{grid.height}x{grid.width}".encode())
+    digest.update(grid.open)
+    return digest.digest()
+
+
+def load_abstraction(filename, grid):
+    """
+    Reads an abstraction written by `Abstraction.save`. Returns None if
+    there is no such file, or if it was built for other walls.
+    """
+    try:
+        archive = np.load(filename)
+    except FileNotFoundError:
+        return None
+    with archive:
+        if archive["signature"].tobytes() != signature(grid):
+            return None
+        return Abstraction(
+            int(archive["cluster_size"]), archive["signature"].tobytes(),
+            archive["nodes"], archive["cluster_offsets"],
+            archive["edge_offsets"], archive["edge_targets"], archive["edge_costs"]
+        )
+
+
+def build_abstraction(grid, cluster_size=CLUSTER_SIZE):
+    """
+    Divides `grid` into clusters of `cluster_size` by `cluster_size` cells
+    and returns its Abstraction: the transitions between clusters, and the
+    distances between transitions within each cluster.
+    """
+    height, width = grid.height, grid.width
+    rows, columns = -(-height // cluster_size), -(-width // cluster_size)
+
+    # Open cells, padded with walls out to whole clusters
+    cells = np.zeros((rows * cluster_size, columns * cluster_size), dtype=bool)
+    cells[:height, :width] = grid.open.reshape(height + 2, grid.stride)[1:-1, 1:-1]
+
+    # Transition pairs across each vertical, then horizontal, cluster border
+    sources = []
+    targets = []
+    for col in range(cluster_size, width, cluster_size):
+        for row in _transitions(cells[:, col - 1] & cells[:, col], cluster_size):
+            sources.append((row, col - 1))
+            targets.append((row, col))
+    for row in range(cluster_size, height, cluster_size):
+        for col in _transitions(cells[row - 1] & cells[row], cluster_size):
+            sources.append((row - 1, col))
+            targets.append((row, col))
+    sources = np.array(sources, dtype=np.int64).reshape(-1, 2)
+    targets = np.array(targets, dtype=np.int64).reshape(-1, 2)
+
+    # Nodes, ordered by cluster and then position
+    positions = np.concatenate([sources, targets])
+    flat = (positions[:, 0] + 1) * grid.stride + positions[:, 1] + 1
+    flat, first = np.unique(flat, return_index=True)
+    positions = positions[first]
+    clusters = positions[:, 0] // cluster_size * columns + positions[:, 1] // cluster_size
+    order = np.lexsort((flat, clusters))
+    nodes, positions, clusters = flat[order], positions[order], clusters[order]
+    cluster_offsets = np.zeros(rows * columns + 1, dtype=np.int64)
+    np.cumsum(np.bincount(clusters, minlength=rows * columns), out=cluster_offsets[1:])
+
+    # Transition edges, both ways
+    source_nodes = _node_ids(nodes, (sources[:, 0] + 1) * grid.stride + sources[:, 1] + 1)
+    target_nodes = _node_ids(nodes, (targets[:, 0] + 1) * grid.stride + targets[:, 1] + 1)
+    edges = [(
+        np.concatenate([source_nodes, target_nodes]),
+        np.concatenate([target_nodes, source_nodes]),
+        np.ones(2 * len(source_nodes), dtype=np.int64)
+    )]
+
+    # Edges within clusters, found a batch of clusters at a time
+    counts = np.diff(cluster_offsets)
+    pending = [int(cluster) for cluster in np.argsort(counts, kind="stable") if counts[cluster] > 1]
+    blocks = cells.reshape(rows, cluster_size, columns, cluster_size).swapaxes(1, 2)
+    local = positions % cluster_size
+    def state_bytes(count):
+        # Search bitsets, plus the distances between every two nodes
+        return cluster_size ** 2 * 8 * 4 * -(-count // 64) + count * count * 16
+
+    i = 0
+    while i < len(pending):
+        j = i + 1
+        while j < len(pending) and (
+            (j + 1 - i) * state_bytes(counts[pending[j]]) <= BATCH_BYTES
+        ):
+            j += 1
+        batch = np.array(pending[i:j], dtype=np.int64)
+        edges.append(_cluster_edges(
+            blocks[batch // columns, batch % columns], cluster_offsets[batch],
+            counts[batch], local
+        ))
+        i = j
+
+    # Compressed rows of edges, by source node
+    sources, targets, costs = (np.concatenate(parts) for parts in zip(*edges))
+    order = np.argsort(sources, kind="stable")
+    edge_offsets = np.zeros(len(nodes) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sources, minlength=len(nodes)), out=edge_offsets[1:])
+    return Abstraction(
+        cluster_size, signature(grid), nodes, cluster_offsets,
+        edge_offsets, targets[order], costs[order]
+    )
+
+
+def _transitions(facing, cluster_size):
+    # Positions along a cluster border of the transitions picked from
+    # `facing`, whether the cells on both sides are open. Each maximal
+    # run of facing cells within one cluster is an entrance.
+    positions = np.arange(len(facing))
+    continues = np.zeros(len(facing), dtype=bool)
+    continues[1:] = facing[:-1] & facing[1:] & (positions[1:] % cluster_size != 0)
+    starts = np.flatnonzero(facing & ~continues)
+    continued = np.zeros(len(facing), dtype=bool)
+    continued[:-1] = continues[1:]
+    ends = np.flatnonzero(facing & ~continued)
+
+    lengths = ends - starts + 1
+    wide = lengths >= WIDE_ENTRANCE
+    middles = starts[~wide] + (lengths[~wide] - 1) // 2
+    return np.sort(np.concatenate([middles, starts[wide], ends[wide]])).tolist()
+
+
+def _node_ids(nodes, flat):
+    # Node numbers of flat cell indices, for nodes ordered by cluster
+    order = np.argsort(nodes)
+    return order[np.searchsorted(nodes, flat, sorter=order)]
+
+
+def _cluster_edges(blocks, firsts, counts, local):
+    # Searches a batch of clusters breadth-first from each of their nodes
+    # at once, and returns the (sources, targets, costs) of edges between
+    # nodes connected within their cluster. `blocks` holds each cluster's
+    # open cells, and `local` each node's position inside its cluster.
+    batch, size = len(blocks), blocks.shape[1]
+    width = int(counts.max())
+    slots = np.arange(width)
+    valid = slots < counts[:, np.newaxis]
+    ids = np.where(valid, firsts[:, np.newaxis] + slots, firsts[:, np.newaxis])
+    rows, cols = local[ids, 0], local[ids, 1]
+
+    # Each cell holds a bitset of the searches that have reached it, one
+    # bit per node of its cluster, in as many 64-bit words as needed
+    words = -(-width // 64)
+    word, bit = slots // 64, (slots % 64).astype(np.uint64)
+    open_cells = np.where(blocks, ~np.uint64(0), np.uint64(0))[..., np.newaxis]
+    frontier = np.zeros((batch, size, size, words), dtype=np.uint64)
+    clusters, starts = np.nonzero(valid)
+    frontier[clusters, rows[clusters, starts], cols[clusters, starts], word[starts]] = (
+        np.uint64(1) << bit[starts]
+    )
+    seen = frontier.copy()
+    costs = np.zeros((batch, width, width), dtype=np.int32)
+
+    # Clusters still searching, so finished ones drop out
+    active = np.arange(batch)
+    distance = 0
+    while active.size:
+        distance += 1
+        reached = np.zeros_like(frontier)
+        reached[:, 1:] = frontier[:, :-1]
+        reached[:, :-1] |= frontier[:, 1:]
+        reached[:, :, 1:] |= frontier[:, :, :-1]
+        reached[:, :, :-1] |= frontier[:, :, 1:]
+        reached &= open_cells[active]
+        reached &= ~seen
+        seen |= reached
+
+        # Record the distance from each search to any node it reached
+        # for the first time
+        at_nodes = reached[
+            np.arange(len(active))[:, np.newaxis], rows[active], cols[active]
+        ]
+        arrived = (at_nodes[:, :, word] >> bit) & np.uint64(1)
+        costs[active] += arrived.swapaxes(1, 2).astype(np.int32) * distance
+
+        running = reached.any(axis=(1, 2, 3))
+        frontier, seen, active = reached[running], seen[running], active[running]
+
+    linked = valid[:, :, np.newaxis] & valid[:, np.newaxis, :] & (costs > 0)
+    sources = np.broadcast_to(ids[:, :, np.newaxis], linked.shape)[linked]
+    targets = np.broadcast_to(ids[:, np.newaxis, :], linked.shape)[linked]
+    return sources, targets, costs[linked].astype(np.int64)
+
+
+def _cluster_bounds(grid, cluster_size, index):
+    # The rows and columns, as ranges, of the cluster holding flat cell `index`
+    row, col = grid.cell(index)
+    top, left = row - row % cluster_size, col - col % cluster_size
+    return top, min(top + cluster_size, grid.height), left, min(left + cluster_size, grid.width)
+
+
+def _cluster_search(grid, cluster_size, source, target=None):
+    # Breadth-first search from flat cell `source` that stays inside its
+    # cluster, stopping early at `target` if given. Returns each reached
+    # cell's (distance, previous cell).
+    top, bottom, left, right = _cluster_bounds(grid, cluster_size, source)
+    stride = grid.stride
+    masks = memoryview(grid.masks)
+    moves = grid.moves
+    reached = {source: (0, None)}
+    frontier = deque([source])
+    while frontier:
+        index = frontier.popleft()
+        if index == target:
+            break
+        distance = reached[index][0] + 1
+        for _, offset in moves[masks[index]]:
+            neighbor = index + offset
+            if neighbor in reached:
+                continue
+            row, col = divmod(neighbor, stride)
+            if top < row <= bottom and left < col <= right:
+                reached[neighbor] = (distance, index)
+                frontier.append(neighbor)
+    return reached
+
+
+def _cluster_distances(grid, cluster_size, source):
+    return {
+        index: distance
+        for index, (distance, _) in _cluster_search(grid, cluster_size, source).items()
+    }
+
+
+def _cluster_path(grid, cluster_size, source, target):
+    # The cells after `source` on a shortest path to `target` inside their
+    # cluster, and how many cells were reached finding it
+    reached = _cluster_search(grid, cluster_size, source, target)
+    cells = []
+    index = target
+    while index != source:
+        cells.append(index)
+        index = reached[index][1]
+    cells.reverse()
+    return cells, len(reached)
+
+
+def _without_loops(path):
+    # Cuts out any stretch of `path` that comes back to a cell already on it
+    result = []
+    positions = {}
+    for index in path:
+        if index in positions:
+            for removed in result[positions[index] + 1:]:
+                del positions[removed]
+            del result[positions[index] + 1:]
+        else:
+            positions[index] = len(result)
+            result.append(index)
+    return result
@@ -1,47 +1,40 @@
+import os
 import sys
 
-class Node():
-    def __init__(self, state, parent, action):
-        self.state = state
-        self.parent = parent
-        self.action = action
+# The search core lives in common/ and is shared with the other projects;
+# its module name is specific to this repository so nothing else on the
+# path can shadow it
+sys.path.append(os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), os.pardir, os.pardir, "common"
+))
 
+from cs50search import (
+    SearchStats, best_first_search, breadth_first_search, depth_first_search,
+    greedy_best_first_search
+)
 
-class StackFrontier():
-    def __init__(self):
-        self.frontier = []
+# Search strategies `Maze.solve` accepts
+STRATEGIES = ("dfs", "bfs", "greedy", "astar", "jps", "hpa")
 
-    def add(self, node):
-        self.frontier.append(node)
-
-    def contains_state(self, state):
-        return any(node.state == state for node in self.frontier)
-
-    def empty(self):
-        return len(self.frontier) == 0
-
-    def remove(self):
-        if self.empty():
-            raise Exception("empty frontier")
-        else:
-            node = self.frontier[-1]
-            self.frontier = self.frontier[:-1]
-            return node
-
-
-class QueueFrontier(StackFrontier):
-
-    def remove(self):
-        if self.empty():
-            raise Exception("empty frontier")
-        else:
-            node = self.frontier[0]
-            self.frontier = self.frontier[1:]
-            return node
 
 class Maze():
 
-    def __init__(self, filename):
+    def __init__(self, filename, backend="nodes"):
+        """
+        Reads a maze from `filename`. With the "grid" backend, the file is
+        memory-mapped into a NumPy array of walls, and solved on a Grid.
+        """
+        if backend not in ("nodes", "grid"):
+            raise Exception("backend must be nodes or grid")
+        self.backend = backend
+        self.grid = None
+        self.solution = None
+
+        if backend == "grid":
+            from grid import read_maze
+            self.walls, self.start, self.goal = read_maze(filename)
+            self.height, self.width = self.walls.shape
+            return
 
         # Read file and set height and width of maze
         with open(filename) as f:
@@ -78,26 +71,12 @@ class Maze():
                     row.append(False)
             self.walls.append(row)
 
-        self.solution = None
-
 
     def print(self):
+        from render import classify, text
         solution = self.solution[1] if self.solution is not None else None
-        print()
-        for i, row in enumerate(self.walls):
-            for j, col in enumerate(row):
-                if col:
-                    print("█", end="")
-                elif (i, j) == self.start:
-                    print("A", end="")
-                elif (i, j) == self.goal:
-                    print("B", end="")
-                elif solution is not None and (i, j) in solution:
-                    print("*", end="")
-                else:
-                    print(" ", end="")
-            print()
-        print()
+        kinds = classify(self.walls, self.start, self.goal, solution)
+        sys.stdout.write("\n" + text(kinds) + "\n\n")
 
 
     def neighbors(self, state):
@@ -116,114 +95,162 @@ class Maze():
         return result
 
 
-    def solve(self):
-        """Finds a solution to maze, if one exists."""
+    def distance_to_goal(self, state):
+        """Manhattan distance from `state` to the goal, ignoring walls."""
+        return abs(state[0] - self.goal[0]) + abs(state[1] - self.goal[1])
 
-        # Keep track of number of states explored
-        self.num_explored = 0
 
-        # Initialize frontier to just the starting position
-        start = Node(state=self.start, parent=None, action=None)
-        frontier = StackFrontier()
-        frontier.add(start)
+    def solve(self, strategy="dfs", stats=None):
+        """
+        Finds a solution to maze, if one exists, using one of STRATEGIES,
+        and records the search in `stats` if given.
 
-        # Initialize an empty explored set
-        self.explored = set()
+        "bfs", "astar" and "jps" (jump point search) find a shortest solution;
+        "greedy" and "dfs" return the first one they reach, and "hpa"
+        (hierarchical search over clusters of cells) a nearly shortest one.
+        The "grid" backend searches a flat NumPy copy of the walls instead of
+        Node objects, for very large mazes; "jps" and "hpa" always run on it.
+        Explored cells are then kept as a 2-D bool array rather than a set.
+        """
+        if self.backend == "grid" or strategy in ("jps", "hpa"):
+            self.solution = self._grid().solve(strategy, stats)
+            self.num_explored = self.grid.num_explored
+            self.explored = self.grid.explored_mask()
+            return
 
-        # Keep looping until solution found
-        while True:
-
-            # If nothing left in frontier, then no path
-            if frontier.empty():
-                raise Exception("no solution")
-
-            # Choose a node from the frontier
-            node = frontier.remove()
-            self.num_explored += 1
-
-            # If node is the goal, then we have a solution
-            if node.state == self.goal:
-                actions = []
-                cells = []
-                while node.parent is not None:
-                    actions.append(node.action)
-                    cells.append(node.state)
-                    node = node.parent
-                actions.reverse()
-                cells.reverse()
-                self.solution = (actions, cells)
-                return
-
-            # Mark node as explored
-            self.explored.add(node.state)
-
-            # Add neighbors to frontier
-            for action, state in self.neighbors(node.state):
-                if not frontier.contains_state(state) and state not in self.explored:
-                    child = Node(state=state, parent=node, action=action)
-                    frontier.add(child)
-
-
-    def output_image(self, filename, show_solution=True, show_explored=False):
-        from PIL import Image, ImageDraw
-        cell_size = 50
-        cell_border = 2
-
-        # Create a blank canvas
-        img = Image.new(
-            "RGBA",
-            (self.width * cell_size, self.height * cell_size),
-            "black"
+        # Search from the start, recording explored states
+        self.explored = set()
+        is_goal = lambda state: state == self.goal
+        if strategy == "dfs":
+            node = depth_first_search(
+                self.start, is_goal, self.neighbors, self.explored, stats
+            )
+        elif strategy == "bfs":
+            node = breadth_first_search(
+                self.start, is_goal, self.neighbors, self.explored, stats
+            )
+        elif strategy == "greedy":
+            node = greedy_best_first_search(
+                self.start, is_goal, self.neighbors, self.distance_to_goal,
+                explored=self.explored, stats=stats
+            )
+        elif strategy == "astar":
+
+            # Among equally promising nodes, prefer the one nearest the goal,
+            # so open areas are crossed instead of filled
+            def priority(node):
+                distance = self.distance_to_goal(node.state)
+                return (node.cost + distance, distance)
+
+            node = best_first_search(
+                self.start, is_goal, self.neighbors, priority,
+                explored=self.explored, stats=stats
+            )
+        else:
+            raise Exception(f"strategy must be one of {', '.join(STRATEGIES)}")
+        if node is None:
+            raise Exception("no solution")
+
+        # Every explored state, plus the goal, was removed from the frontier
+        self.num_explored = len(self.explored) + 1
+        self.solution = node.path()
+
+
+    def path_from(self, start, goals=None):
+        """
+        Returns the (actions, cells) of a shortest path from `start` to the
+        nearest of `goals` (the maze's goal, if not given), read off a
+        distance field that is computed once per set of goals and cached
+        (for as many recently used sets of goals as fit in grid.FIELD_BUDGET).
+        """
+        return self._grid().path_from(start, goals)
+
+
+    def use_abstraction(self, filename):
+        """
+        Loads the cluster abstraction "hpa" searches run on from `filename`,
+        or builds it and saves it there if the file is missing or was built
+        for different walls.
+        """
+        from hpa import build_abstraction, load_abstraction
+        grid = self._grid()
+        grid.abstraction = load_abstraction(filename, grid)
+        if grid.abstraction is None:
+            grid.abstraction = build_abstraction(grid)
+            grid.abstraction.save(filename)
+
+
+    def _grid(self):
+        # The Grid copy of the maze, made when first needed
+        if self.grid is None:
+            from grid import Grid
+            self.grid = Grid(self.walls, self.start, self.goal)
+        return self.grid
+
+
+    def output_image(self, filename, show_solution=True, show_explored=False,
+                     max_pixels=None):
+        """
+        Draws the maze to a PNG image. Cells are 50 pixels across unless
+        that would take more than `max_pixels` pixels (render.MAX_PIXELS by
+        default), in which case they are drawn smaller or several to a pixel.
+        """
+        from render import MAX_PIXELS, classify, write_png
+        solution = self.solution[1] if self.solution is not None else None
+        kinds = classify(
+            self.walls, self.start, self.goal,
+            solution if show_solution else None,
+            self.explored if solution is not None and show_explored else None
+        )
+        write_png(filename, kinds, max_pixels or MAX_PIXELS)
+
+
+def main():
+    # --stats reports what the search did, including its peak memory
+    stats = SearchStats(trace_memory=True) if "--stats" in sys.argv else None
+    args = [arg for arg in sys.argv if arg != "--stats"]
+
+    # --grid reads the maze into, and searches, a flat NumPy grid
+    backend = "grid" if "--grid" in args else "nodes"
+    args = [arg for arg in args if arg != "--grid"]
+
+    # --strategy=NAME picks the search, depth-first by default,
+    # --abstraction=FILE keeps the "hpa" cluster abstraction in FILE, and
+    # --max-pixels=N caps the size of the image drawn
+    strategy = "dfs"
+    abstraction = None
+    max_pixels = None
+    for arg in args[1:]:
+        if arg.startswith("--strategy="):
+            strategy = arg[len("--strategy="):]
+            args.remove(arg)
+        elif arg.startswith("--abstraction="):
+            abstraction = arg[len("--abstraction="):]
+            args.remove(arg)
+        elif arg.startswith("--max-pixels=") and arg[len("--max-pixels="):].isdigit():
+            max_pixels = int(arg[len("--max-pixels="):])
+            args.remove(arg)
+    if len(args) != 2 or strategy not in STRATEGIES or max_pixels == 0:
+        sys.exit(
+            "Usage: python maze.py [--stats] [--grid] "
+            f"[--strategy={'|'.join(STRATEGIES)}] [--abstraction=FILE] "
+            "[--max-pixels=N] maze.txt"
         )
-        draw = ImageDraw.Draw(img)
 
-        solution = self.solution[1] if self.solution is not None else None
-        for i, row in enumerate(self.walls):
-            for j, col in enumerate(row):
-
-                # Walls
-                if col:
-                    fill = (40, 40, 40)
-
-                # Start
-                elif (i, j) == self.start:
-                    fill = (255, 0, 0)
-
-                # Goal
-                elif (i, j) == self.goal:
-                    fill = (0, 171, 28)
-
-                # Solution
-                elif solution is not None and show_solution and (i, j) in solution:
-                    fill = (220, 235, 113)
-
-                # Explored
-                elif solution is not None and show_explored and (i, j) in self.explored:
-                    fill = (212, 97, 85)
-
-                # Empty cell
-                else:
-                    fill = (237, 240, 252)
-
-                # Draw cell
-                draw.rectangle(
-                    ([(j * cell_size + cell_border, i * cell_size + cell_border),
-                      ((j + 1) * cell_size - cell_border, (i + 1) * cell_size - cell_border)]),
-                    fill=fill
-                )
-
-        img.save(filename)
-
-
-if len(sys.argv) != 2:
-    sys.exit("Usage: python maze.py maze.txt")
-
-m = Maze(sys.argv[1])
-print("Maze:")
-m.print()
-print("Solving...")
-m.solve()
-print("States Explored:", m.num_explored)
-print("Solution:")
-m.print()
-m.output_image("maze.png", show_explored=True)
+    m = Maze(args[1], backend)
+    print("Maze:")
+    m.print()
+    print("Solving...")
+    if abstraction is not None and strategy == "hpa":
+        m.use_abstraction(abstraction)
+    m.solve(strategy, stats)
+    print("States Explored:", m.num_explored)
+    if stats is not None:
+        print(stats)
+    print("Solution:")
+    m.print()
+    m.output_image("maze.png", show_explored=True, max_pixels=max_pixels)
+
+
+if __name__ == "__main__":
+    main()
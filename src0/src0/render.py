@@ -0,0 +1,169 @@
+import math
+import struct
+import zlib
+
+import numpy as np
+
+# Kinds of cell, each drawn over the ones before it
+EMPTY, EXPLORED, SOLUTION, GOAL, START, WALL = range(6)
+
+# Color of each kind of cell in images
+COLORS = np.array([
+    (237, 240, 252),
+    (212, 97, 85),
+    (220, 235, 113),
+    (0, 171, 28),
+    (255, 0, 0),
+    (40, 40, 40)
+], dtype=np.uint8)
+
+# Largest square drawn for a cell, and its inset, in pixels
+CELL_SIZE = 50
+CELL_BORDER = 2
+
+# Most pixels an image may have before cells are drawn smaller, and
+# roughly how many pixels are built in memory at once while writing one
+MAX_PIXELS = 25_000_000
+STRIP_PIXELS = 4_000_000
+
+# Character for each kind of cell in text; explored cells are not shown
+CHARACTERS = np.array([ord(c) for c in "  *BA█"], dtype=np.uint32)
+
+
+def classify(walls, start, goal, solution=None, explored=None):
+    """
+    Returns a 2-D array giving the kind of each cell of a maze.
+
+    `solution` and `explored` may each be a collection of (row, col)
+    cells or a 2-D bool array. Each kind is filled in with a single
+    array assignment, rather than by checking each cell in turn.
+    """
+    walls = np.asarray(walls, dtype=bool)
+    kinds = np.full(walls.shape, EMPTY, dtype=np.uint8)
+    if explored is not None:
+        _mark(kinds, explored, EXPLORED)
+    if solution is not None:
+        _mark(kinds, solution, SOLUTION)
+    kinds[goal] = GOAL
+    kinds[start] = START
+    kinds[walls] = WALL
+    return kinds
+
+
+def _mark(kinds, cells, kind):
+    if isinstance(cells, np.ndarray):
+        kinds[cells] = kind
+        return
+    cells = np.array(list(cells), dtype=np.int64).reshape(-1, 2)
+    kinds[cells[:, 0], cells[:, 1]] = kind
+
+
+def image(kinds, cell_size=CELL_SIZE, cell_border=CELL_BORDER):
+    """
+    Returns an RGB pixel array drawing each cell as a square of
+    `cell_size` pixels, inset by `cell_border` on a black background.
+    """
+    height, width = kinds.shape
+    inside = np.zeros(cell_size, dtype=bool)
+    inside[cell_border:cell_size - cell_border + 1] = True
+
+    # Stretch each row of colors across, blacking out the gaps between
+    # cells, then stretch the rows down and black out the gaps between rows
+    rows = np.repeat(COLORS[kinds], cell_size, axis=1)
+    rows[:, ~np.tile(inside, width)] = 0
+    pixels = np.repeat(rows, cell_size, axis=0)
+    pixels.reshape(height, cell_size, width * cell_size, 3)[:, ~inside] = 0
+    return pixels
+
+
+def text(kinds):
+    """
+    Returns the maze as lines of characters, one per row.
+    """
+    height, width = kinds.shape
+
+    # Each row of character codes is viewed as one string
+    codes = np.ascontiguousarray(CHARACTERS[kinds])
+    rows = codes.view(f"<U{width}").reshape(height)
+    return "\n".join(rows.tolist())
+
+
+def layout(height, width, max_pixels=MAX_PIXELS):
+    """
+    Returns (cell_size, cells_per_pixel) for drawing a `height` by `width`
+    maze in at most `max_pixels` pixels: the largest square up to
+    CELL_SIZE pixels per cell that fits or, if even one pixel per cell is
+    too many, how many cells across each pixel must cover.
+    """
+    cells = max(1, height * width)
+    cell_size = min(CELL_SIZE, math.isqrt(max_pixels // cells))
+    if cell_size >= 1:
+        return cell_size, 1
+    return 1, math.ceil(math.sqrt(cells / max_pixels))
+
+
+def downsample(kinds, factor):
+    """
+    Returns the kinds of `factor` by `factor` blocks of cells. A block
+    takes the highest kind other than wall within it, so the start, goal
+    and solution stay visible, or else is a wall if at least half of it is.
+    """
+    height, width = kinds.shape
+    rows, columns = -(-height // factor), -(-width // factor)
+    blocks = np.full((rows * factor, columns * factor), EMPTY, dtype=np.uint8)
+    blocks[:height, :width] = kinds
+    blocks = blocks.reshape(rows, factor, columns, factor)
+
+    walls = blocks == WALL
+    small = np.where(walls, EMPTY, blocks).max(axis=(1, 3))
+    small[(small == EMPTY) & (walls.sum(axis=(1, 3)) * 2 >= factor * factor)] = WALL
+    return small
+
+
+def write_png(filename, kinds, max_pixels=MAX_PIXELS, strip_pixels=STRIP_PIXELS):
+    """
+    Writes the maze as a PNG image of at most `max_pixels` pixels, choosing
+    the cell size with `layout` and downsampling if need be.
+
+    The image is built, downsampled and compressed a strip of rows at a
+    time, so only about `strip_pixels` pixels, or cells when downsampling,
+    are ever held in memory, however large the maze.
+    """
+    cell_size, factor = layout(*kinds.shape, max_pixels)
+    cell_border = cell_size * CELL_BORDER // CELL_SIZE
+    height, width = -(-kinds.shape[0] // factor), -(-kinds.shape[1] // factor)
+    strip = max(1, strip_pixels // (width * (cell_size * factor) ** 2))
+
+    with open(filename, "wb") as f:
+        f.write(b"\x89PNG\r\n\x1a\n")
+        _write_chunk(f, b"IHDR", struct.pack(
+            ">IIBBBBB", width * cell_size, height * cell_size, 8, 2, 0, 0, 0
+        ))
+        compressor = zlib.compressobj()
+        previous = np.zeros(width * cell_size * 3, dtype=np.uint8)
+        for first in range(0, height, strip):
+            cells = kinds[first * factor:(first + strip) * factor]
+            if factor > 1:
+                cells = downsample(cells, factor)
+            pixels = image(cells, cell_size, cell_border)
+            pixels = pixels.reshape(pixels.shape[0], -1)
+
+            # Each line is stored as its difference from the line above
+            # (PNG filter type 2), so repeated lines compress to almost nothing
+            lines = np.empty((pixels.shape[0], 1 + pixels.shape[1]), dtype=np.uint8)
+            lines[:, 0] = 2
+            lines[0, 1:] = pixels[0] - previous
+            lines[1:, 1:] = pixels[1:] - pixels[:-1]
+            previous = pixels[-1]
+            data = compressor.compress(lines.tobytes())
+            if data:
+                _write_chunk(f, b"IDAT", data)
+        _write_chunk(f, b"IDAT", compressor.flush())
+        _write_chunk(f, b"IEND", b"")
+
+
+def _write_chunk(f, kind, data):
+    f.write(struct.pack(">I", len(data)))
+    f.write(kind)
+    f.write(data)
+    f.write(struct.pack(">I", zlib.crc32(data, zlib.crc32(kind))))